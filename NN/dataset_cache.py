@@ -0,0 +1,189 @@
+"""
+Кэш предобработанной обучающей выборки.
+
+Разбор res.csv, кодирование пола, обучение шести LabelEncoder и StandardScaler
+выполняются один раз; результат ложится в каталог рядом с CSV:
+
+    features.npy       float32 [N, 5]  - масштабированные признаки
+    labels.npy         int32   [N, 6]  - номера классов по частям тела (порядок BODY_PARTS)
+    preprocessors.pkl  {'scaler': StandardScaler, 'encoders': {часть тела: LabelEncoder}}
+    meta.json          версия формата, sha256 исходного CSV, число строк
+
+Массивы открываются через np.load(mmap_mode='r'), поэтому загрузка кэша не
+читает выборку целиком. Кэш пересобирается, когда меняется sha256 CSV.
+
+Пример:
+    python dataset_cache.py res.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+CACHE_FORMAT = 1
+
+BODY_PARTS = ['head', 'arms', 'neck', 'body', 'legs', 'shoes']
+LABEL_COLUMNS = {
+    'head': 'Head_Clothing',
+    'arms': 'Arms_Clothing',
+    'neck': 'Neck_Clothing',
+    'body': 'Body_Clothing',
+    'legs': 'Legs_Clothing',
+    'shoes': 'Shoes_Clothing'
+}
+FEATURE_COLUMNS = ['Temperature', 'Wind_Speed', 'Precipitation', 'Sex', 'Age']
+SEX_MAPPING = {'male': 0, 'female': 1}
+
+
+class PreparedDataset:
+    """
+    Args:
+        features (np.ndarray): Масштабированные признаки [N, 5].
+        labels (np.ndarray): Метки [N, 6] в порядке BODY_PARTS.
+        scaler (StandardScaler): Обученный scaler.
+        encoders (dict): Часть тела -> LabelEncoder.
+        source_sha256 (str): Хэш CSV, из которого построена выборка.
+    """
+
+    def __init__(self, features, labels, scaler, encoders, source_sha256):
+        self.features = features
+        self.labels = labels
+        self.scaler = scaler
+        self.encoders = encoders
+        self.source_sha256 = source_sha256
+
+    def __len__(self):
+        return len(self.features)
+
+    def num_classes(self):
+        return {part: len(self.encoders[part].classes_) for part in BODY_PARTS}
+
+    def targets(self, indices=None):
+        """Метки в виде, который ожидает model.fit: часть тела -> массив (N, 1)."""
+        labels = self.labels if indices is None else self.labels[indices]
+        return {part: labels[:, i:i + 1] for i, part in enumerate(BODY_PARTS)}
+
+
+def check_unique(values, le, category_name):
+    if len(set(values)) < 2:
+        raise ValueError(f"Категория '{category_name}' должна содержать как минимум два уникальных значения для кодирования.")
+    return le.fit_transform(values)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_cache_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + '.cache'
+
+
+def prepare(csv_path):
+    """Полная предобработка CSV без кэша."""
+    source_sha256 = file_sha256(csv_path)
+    data = pd.read_csv(csv_path, encoding='utf-8')
+    data.fillna('', inplace=True)
+    data['Sex'] = data['Sex'].map(SEX_MAPPING)
+
+    encoders = {part: LabelEncoder() for part in BODY_PARTS}
+    labels = np.empty((len(data), len(BODY_PARTS)), dtype=np.int32)
+    for i, part in enumerate(BODY_PARTS):
+        labels[:, i] = check_unique(data[LABEL_COLUMNS[part]].values, encoders[part], LABEL_COLUMNS[part])
+
+    scaler = StandardScaler()
+    features = scaler.fit_transform(data[FEATURE_COLUMNS].values).astype(np.float32)
+    return PreparedDataset(features, labels, scaler, encoders, source_sha256)
+
+
+def save(dataset, cache_dir):
+    """Записывает кэш во временный каталог и подменяет им старый."""
+    tmp_dir = f'{cache_dir}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, 'features.npy'), np.ascontiguousarray(dataset.features))
+    np.save(os.path.join(tmp_dir, 'labels.npy'), np.ascontiguousarray(dataset.labels))
+    with open(os.path.join(tmp_dir, 'preprocessors.pkl'), 'wb') as f:
+        pickle.dump({'scaler': dataset.scaler, 'encoders': dataset.encoders}, f)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'format': CACHE_FORMAT,
+            'source_sha256': dataset.source_sha256,
+            'rows': len(dataset),
+            'body_parts': BODY_PARTS,
+            'feature_columns': FEATURE_COLUMNS,
+        }, f, indent=2)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def load(cache_dir):
+    """Открывает кэш; массивы отображаются в память только для чтения."""
+    with open(os.path.join(cache_dir, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format') != CACHE_FORMAT or meta.get('body_parts') != BODY_PARTS:
+        raise ValueError(f"{cache_dir}: unsupported dataset cache format")
+    features = np.load(os.path.join(cache_dir, 'features.npy'), mmap_mode='r')
+    labels = np.load(os.path.join(cache_dir, 'labels.npy'), mmap_mode='r')
+    with open(os.path.join(cache_dir, 'preprocessors.pkl'), 'rb') as f:
+        preprocessors = pickle.load(f)
+    return PreparedDataset(features, labels, preprocessors['scaler'], preprocessors['encoders'], meta['source_sha256'])
+
+
+def load_dataset(csv_path, cache_dir=None, use_cache=True):
+    """
+    Загружает выборку из кэша или строит её из CSV и сохраняет кэш.
+
+    Если CSV нет, но кэш есть, используется кэш как есть.
+    """
+    if not use_cache:
+        return prepare(csv_path)
+
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    csv_exists = os.path.exists(csv_path)
+
+    if os.path.isdir(cache_dir):
+        try:
+            dataset = load(cache_dir)
+        except (OSError, ValueError, KeyError, pickle.UnpicklingError):
+            dataset = None
+        if dataset is not None and (not csv_exists or dataset.source_sha256 == file_sha256(csv_path)):
+            return dataset
+
+    if not csv_exists:
+        raise FileNotFoundError(csv_path)
+    dataset = prepare(csv_path)
+    try:
+        save(dataset, cache_dir)
+    except OSError as exc:
+        print(f"Не удалось записать кэш выборки '{cache_dir}': {exc}")
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Предобработка res.csv в кэш для обучения')
+    parser.add_argument('csv', nargs='?', default='res.csv')
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--force', action='store_true', help='Пересобрать кэш, даже если он актуален')
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir or default_cache_dir(args.csv)
+    if args.force:
+        dataset = prepare(args.csv)
+        save(dataset, cache_dir)
+    else:
+        dataset = load_dataset(args.csv, cache_dir)
+    print(f"Кэш '{cache_dir}': {len(dataset)} строк, sha256 {dataset.source_sha256[:12]}")
+
+
+if __name__ == '__main__':
+    main()
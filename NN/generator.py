@@ -1,5 +1,16 @@
+import argparse
 import csv
+import os
 import random
+import shutil
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+
+# Каталог одежды читается и компилируется в ww-api/app/catalog.py (общий код с сервером)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ww-api'))
+from app.catalog import load_catalog, parse_csv as load_clothing, weather_category
 
 def get_weather_category(temperature, precipitation):
     categories = [
@@ -31,31 +42,6 @@ def get_weather_category(temperature, precipitation):
         return 34
     return None
 
-def load_clothing(filename):
-    clothing_dict = {}
-    with open(filename, encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        headers = next(reader)
-        for row in reader:
-            if len(row) < 5:
-                continue
-            clothing = row[0].strip()
-            gender = row[1].strip()
-            age = row[2].strip()
-            body_part = row[3].strip()
-            categories = []
-            for cat in row[4:]:
-                cat = cat.strip().rstrip(',')
-                if cat.isdigit():
-                    categories.append(int(cat))
-            if body_part not in clothing_dict:
-                clothing_dict[body_part] = {}
-            for category in categories:
-                if category not in clothing_dict[body_part]:
-                    clothing_dict[body_part][category] = []
-                clothing_dict[body_part][category].append(clothing)
-    return clothing_dict
-
 def select_clothing(clothing_dict, category, body_part):
     if body_part not in clothing_dict:
         return ''
@@ -69,6 +55,153 @@ def generate_random_weather():
     precipitation = random.choices([0, 1], weights=[70, 30])[0]
     return temperature, wind_speed, precipitation
 
+REQUIRED_PARTS = ['Голова', 'Тело', 'Ноги', 'Обувь']
+OUTPUT_HEADERS = [
+    'Temperature', 'Wind_Speed', 'Precipitation', 'Category',
+    'Sex', 'Age',
+    'Head_Clothing', 'Body_Clothing', 'Legs_Clothing', 'Shoes_Clothing',
+    'Arms_Clothing', 'Neck_Clothing'
+]
+PART_COLUMNS = [
+    ('Голова', 'Head_Clothing'), ('Тело', 'Body_Clothing'), ('Ноги', 'Legs_Clothing'),
+    ('Обувь', 'Shoes_Clothing'), ('Руки', 'Arms_Clothing'), ('Шея', 'Neck_Clothing'),
+]
+
+
+def generate_chunk(rng, catalog, size):
+    """
+    Генерирует до size строк одним набором векторных операций.
+
+    Строки без вещей для обязательных частей тела отбрасываются, как в main().
+    """
+    temperature = np.round(rng.uniform(-40, 40, size), 1)
+    wind_speed = np.round(rng.uniform(0, 30, size), 1)
+    precipitation = (rng.random(size) < 0.3).astype(np.int8)
+    category = weather_category(temperature, precipitation)
+
+    keep = np.ones(size, dtype=bool)
+    clothing = {}
+    for part, column in PART_COLUMNS:
+        clothing[column], found = catalog.sample(rng, part, category)
+        if part in REQUIRED_PARTS:
+            keep &= found
+
+    columns = {
+        'Temperature': temperature,
+        'Wind_Speed': wind_speed,
+        'Precipitation': precipitation,
+        'Category': category,
+        'Sex': np.where(rng.random(size) < 0.5, 'male', 'female'),
+        'Age': rng.integers(18, 66, size),
+    }
+    columns.update(clothing)
+    return {name: columns[name][keep] for name in OUTPUT_HEADERS}
+
+
+class _ChunkWriter:
+    """Потоковая запись чанков в CSV или Parquet (группа строк на чанк)."""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self._file = None
+        self._parquet = None
+
+    def write(self, chunk):
+        import pandas as pd
+
+        frame = pd.DataFrame(chunk, columns=OUTPUT_HEADERS)
+        if self.fmt == 'csv':
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='', encoding='utf-8')
+                frame.iloc[:0].to_csv(self._file, index=False)
+            frame.to_csv(self._file, index=False, header=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+
+    def close(self):
+        if self._file is None and self.fmt == 'csv':
+            # Пустой шард: только заголовок
+            self.write({name: [] for name in OUTPUT_HEADERS})
+        if self._file is not None:
+            self._file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def generate_shard(task):
+    """Генерирует rows строк в файл path с собственным SeedSequence шарда."""
+    path, rows, seed_sequence, catalog, chunk_size, fmt = task
+    rng = np.random.default_rng(seed_sequence)
+    writer = _ChunkWriter(path, fmt)
+    written = 0
+    try:
+        while written < rows:
+            needed = min(chunk_size, rows - written)
+            # Небольшой запас на отброшенные строки
+            chunk = generate_chunk(rng, catalog, needed + needed // 4 + 16)
+            chunk = {name: values[:needed] for name, values in chunk.items()}
+            if len(chunk['Temperature']) == 0:
+                raise ValueError("В каталоге одежды нет вещей для обязательных частей тела ни в одной категории")
+            writer.write(chunk)
+            written += len(chunk['Temperature'])
+    finally:
+        writer.close()
+    return written
+
+
+def main_fast(rows, output_filename='res.csv', clothing_filename='file.csv', shards=1,
+              chunk_size=200_000, seed=42, fmt='csv'):
+    """
+    Быстрый режим генерации: массивы numpy, потоковая запись чанками и шарды по процессам.
+
+    Каждый шард получает собственный дочерний SeedSequence от seed, поэтому
+    результат воспроизводим при тех же rows, shards, chunk_size и seed.
+    CSV-шарды склеиваются в output_filename, Parquet-шарды остаются
+    отдельными файлами <имя>-NNNNN.parquet.
+    """
+    catalog = load_catalog(clothing_filename)
+    missing_required = [part for part in REQUIRED_PARTS if part not in catalog.parts]
+    if missing_required:
+        print(f"Внимание: В файле '{clothing_filename}' отсутствуют предметы для частей тела: {', '.join(missing_required)}.")
+        print("Пожалуйста, добавьте соответствующие записи в 'file.csv'.")
+        return []
+
+    stem, _ = os.path.splitext(output_filename)
+    if fmt == 'csv' and shards == 1:
+        paths = [output_filename]
+    else:
+        paths = [f'{stem}-{i:05d}.{fmt}' for i in range(shards)]
+    shard_rows = [rows // shards + (1 if i < rows % shards else 0) for i in range(shards)]
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    tasks = [(path, n, s, catalog, chunk_size, fmt) for path, n, s in zip(paths, shard_rows, seeds)]
+
+    if shards == 1:
+        written = [generate_shard(tasks[0])]
+    else:
+        with Pool(min(shards, os.cpu_count() or 1)) as pool:
+            written = pool.map(generate_shard, tasks)
+
+    if fmt == 'csv' and shards > 1:
+        with open(output_filename, 'wb') as out:
+            for i, path in enumerate(paths):
+                with open(path, 'rb') as part:
+                    if i > 0:
+                        part.readline()  # заголовок
+                    shutil.copyfileobj(part, out, 1 << 20)
+                os.remove(path)
+        paths = [output_filename]
+
+    print(f"Сгенерировано {sum(written)} записей: {', '.join(paths)}")
+    return paths
+
+
 def main():
     random.seed(42)
 
@@ -145,4 +278,18 @@ def main():
         print(f"Файл '{output_filename}' успешно создан с {records_generated} записями.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Генерация обучающей выборки res.csv')
+    parser.add_argument('--fast', action='store_true', help='Векторизованный режим с чанками и шардами')
+    parser.add_argument('--rows', type=int, default=10000, help='Число строк (режим --fast)')
+    parser.add_argument('--shards', type=int, default=1, help='Число шардов/процессов (режим --fast)')
+    parser.add_argument('--chunk-size', type=int, default=200_000, help='Строк в чанке записи (режим --fast)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', default='res.csv')
+    args = parser.parse_args()
+
+    if args.fast:
+        main_fast(args.rows, args.output, shards=args.shards, chunk_size=args.chunk_size,
+                  seed=args.seed, fmt=args.format)
+    else:
+        main()
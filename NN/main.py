@@ -1,12 +1,239 @@
+"""
+Конвертация модели в TFLite с опциональным квантованием и отчётом.
+
+Режимы:
+    float32  - без оптимизаций (как раньше)
+    dynamic  - int8-веса, активации во float (dynamic range)
+    float16  - веса в float16
+    int8     - полностью целочисленная модель; диапазоны активаций калибруются
+               на представительной выборке из обучающей части res.csv
+
+Для каждого режима печатается и пишется в JSON отчёт: точность по частям тела
+в сравнении с Keras-моделью, доля совпадений с её ответами, размер файла и
+медианная задержка интерпретатора на одной строке и на батче.
+
+Примеры:
+    python main.py
+    python main.py --mode all --report quantization.json
+    python main.py --mode int8 --output model_int8.tflite
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
 import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+from dataset_cache import BODY_PARTS, load_dataset as load_prepared
+
+# Порядок выходов сигнатуры определяется так же, как в TFLite-движке сервера
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ww-api'))
+from app.engine import order_outputs
+
+MODES = ('float32', 'dynamic', 'float16', 'int8')
+
+
+def load_splits(data_path):
+    """Тот же train/test, что и при обучении в neiro.py."""
+    dataset = load_prepared(data_path)
+    train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42)
+    X_train = np.asarray(dataset.features[train_idx], dtype=np.float32)
+    X_test = np.asarray(dataset.features[test_idx], dtype=np.float32)
+    return X_train, X_test, np.asarray(dataset.labels[test_idx])
+
+
+def serving_function(model):
+    """
+    Сигнатура serving_default с выходами, названными по частям тела.
+
+    from_keras_model под Keras 3 называет выходы output_0..output_5,
+    поэтому модель конвертируется из такой конкретной функции.
+    """
+    spec = tf.TensorSpec([None, model.inputs[0].shape[-1]], tf.float32, name='features')
+
+    @tf.function(input_signature=[spec])
+    def serving(features):
+        return dict(zip(model.output_names, model(features, training=False)))
+
+    return serving.get_concrete_function()
+
+
+def convert(model, mode, representative=None):
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([serving_function(model)], model)
+    if mode == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif mode == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if representative is None:
+            raise ValueError("int8 mode needs a representative dataset")
+
+        def representative_dataset():
+            for row in representative:
+                yield [row[np.newaxis, :]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif mode != 'float32':
+        raise ValueError(f"Unknown mode: {mode!r}")
+    return converter.convert()
+
+
+class TFLiteRunner:
+    """Обёртка над сигнатурой serving_default: квантование входа и деквантование выходов."""
+
+    def __init__(self, model_content):
+        self.interpreter = tf.lite.Interpreter(model_content=model_content)
+        self.runner = self.interpreter.get_signature_runner()
+        (self.input_name, self.input_details), = self.runner.get_input_details().items()
+        self.output_details = self.runner.get_output_details()
+        names = order_outputs({name: name for name in self.output_details})
+        self.output_names = dict(zip(BODY_PARTS, names))
+
+    def __call__(self, x):
+        scale, zero_point = self.input_details['quantization']
+        if self.input_details['dtype'] != np.float32:
+            x = np.clip(np.round(x / scale + zero_point), -128, 127)
+        outputs = self.runner(**{self.input_name: x.astype(self.input_details['dtype'])})
+        probabilities = {}
+        for part, name in self.output_names.items():
+            value = outputs[name]
+            scale, zero_point = self.output_details[name]['quantization']
+            if self.output_details[name]['dtype'] != np.float32:
+                value = (value.astype(np.float32) - zero_point) * scale
+            probabilities[part] = value
+        return probabilities
+
+
+def keras_predict(model, x, batch_size=256):
+    outputs = model.predict(x, batch_size=batch_size, verbose=0)
+    return dict(zip(model.output_names, outputs))
+
+
+def predict_batched(predict_fn, x, batch_size=256):
+    chunks = [predict_fn(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+    return {part: np.concatenate([chunk[part] for chunk in chunks]) for part in BODY_PARTS}
+
+
+def median_latency_ms(fn, x, repeats):
+    fn(x)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(x)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1000.0)
+
+
+def head_accuracy(probabilities, labels):
+    return {part: float(np.mean(np.argmax(probabilities[part], axis=1) == labels[:, i]))
+            for i, part in enumerate(BODY_PARTS)}
+
+
+def evaluate(model_content, X_test, y_test, keras_probabilities, batch_size, repeats):
+    runner = TFLiteRunner(model_content)
+    probabilities = predict_batched(runner, X_test, batch_size)
+    agreement = {
+        part: float(np.mean(np.argmax(probabilities[part], axis=1) == np.argmax(keras_probabilities[part], axis=1)))
+        for part in BODY_PARTS
+    }
+    return {
+        'accuracy': head_accuracy(probabilities, y_test),
+        'agreement_with_keras': agreement,
+        'latency_single_ms': median_latency_ms(runner, X_test[:1], repeats),
+        'latency_batch_ms': median_latency_ms(runner, X_test[:batch_size], repeats),
+        'batch_size': batch_size,
+    }
+
+
+def print_report(report):
+    keras = report['keras']['accuracy']
+    print(f"{'mode':<8} {'size, KB':>9} {'1 row, ms':>10} {'batch, ms':>10}  accuracy (Δ vs keras)")
+    for mode, entry in report['modes'].items():
+        size = entry['bytes'] / 1024
+        if 'accuracy' not in entry:
+            print(f"{mode:<8} {size:9.1f}")
+            continue
+        deltas = ' '.join(f"{part}={entry['accuracy'][part]:.4f}({entry['accuracy'][part] - keras[part]:+.4f})"
+                          for part in BODY_PARTS)
+        print(f"{mode:<8} {size:9.1f} {entry['latency_single_ms']:10.3f} {entry['latency_batch_ms']:10.3f}  {deltas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Конвертация модели в TFLite с квантованием')
+    parser.add_argument('--model', default='best.h5')
+    parser.add_argument('--mode', choices=MODES + ('all',), default='float32')
+    parser.add_argument('--output', default='model.tflite',
+                        help='Файл результата; в режиме all к имени добавляется _<режим>')
+    parser.add_argument('--data', default='res.csv', help='Выборка для калибровки int8 и отчёта')
+    parser.add_argument('--representative-samples', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=256, help='Размер батча для замера задержки')
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--report', default=None, help='Куда записать отчёт в JSON')
+    parser.add_argument('--no-report', action='store_true', help='Только конвертация, без оценки')
+    args = parser.parse_args()
+
+    # Загрузка модели
+    model = tf.keras.models.load_model(args.model)
+    modes = MODES if args.mode == 'all' else (args.mode,)
+
+    have_data = os.path.exists(args.data) or os.path.isdir(os.path.splitext(args.data)[0] + '.cache')
+    if not have_data and ('int8' in modes or not args.no_report):
+        if 'int8' in modes:
+            parser.error(f"int8 mode needs training data: {args.data} not found")
+        print(f"'{args.data}' не найден, отчёт не строится")
+        args.no_report = True
+
+    X_train = X_test = y_test = None
+    if have_data:
+        X_train, X_test, y_test = load_splits(args.data)
+
+    report = {'model': args.model, 'modes': {}}
+    keras_probabilities = None
+    if not args.no_report:
+        keras_probabilities = keras_predict(model, X_test, args.batch_size)
+        report['keras'] = {
+            'accuracy': head_accuracy(keras_probabilities, y_test),
+            'bytes': os.path.getsize(args.model),
+        }
+
+    for mode in modes:
+        representative = None
+        if mode == 'int8':
+            rng = np.random.default_rng(0)
+            size = min(args.representative_samples, len(X_train))
+            representative = X_train[rng.choice(len(X_train), size=size, replace=False)]
+
+        # Конвертация в TFLite
+        tflite_model = convert(model, mode, representative)
+
+        # Сохранение модели
+        if args.mode == 'all':
+            root, ext = os.path.splitext(args.output)
+            path = f'{root}_{mode}{ext}'
+        else:
+            path = args.output
+        with open(path, 'wb') as f:
+            f.write(tflite_model)
+
+        entry = {'path': path, 'bytes': len(tflite_model)}
+        if not args.no_report:
+            entry.update(evaluate(tflite_model, X_test, y_test, keras_probabilities, args.batch_size, args.repeats))
+        report['modes'][mode] = entry
 
-# Загрузка модели
-model = tf.keras.models.load_model('best.h5')
+    if not args.no_report:
+        print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
 
-# Конвертация в TFLite
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
-tflite_model = converter.convert()
 
-# Сохранение модели
-with open('model.tflite', 'wb') as f:
-    f.write(tflite_model)
\ No newline at end of file
+if __name__ == '__main__':
+    main()
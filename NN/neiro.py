@@ -1,280 +1,438 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+from types import SimpleNamespace
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-from tensorflow.keras.models import Model
+import tensorflow as tf
+from tensorflow.keras.models import Model, load_model
 from tensorflow.keras.layers import Input, Dense, Dropout
 from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import Callback, EarlyStopping
 import matplotlib.pyplot as plt
-import pickle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ww-api'))
+from app.artifact import write_artifact
+# Ствол сети, переиспользуемый при дообучении: те же слои читает write_artifact
+from app.engine import TRUNK_LAYERS
+
+from dataset_cache import (
+    BODY_PARTS, LABEL_COLUMNS, FEATURE_COLUMNS, SEX_MAPPING, check_unique, load_dataset as load_prepared,
+)
+
 
 # 1. Загрузка и предобработка данных
-# Предполагается, что res.csv теперь содержит столбцы:
+# Предполагается, что res.csv содержит столбцы:
 # Temperature,Wind_Speed,Precipitation,Category,Sex,Age,
 # Head_Clothing,Arms_Clothing,Neck_Clothing,Body_Clothing,Legs_Clothing,Shoes_Clothing
 
-data = pd.read_csv('res.csv', encoding='utf-8')
-
-# Заполнение отсутствующих значений пустыми строками
-data.fillna('', inplace=True)
-
-# Кодируем пол: 'male' → 0, 'female' → 1
-data['Sex'] = data['Sex'].map({'male': 0, 'female': 1})
-
-# Определение входных признаков: добавляем Sex и Age
-X = data[['Temperature', 'Wind_Speed', 'Precipitation', 'Sex', 'Age']].values
-
-# Целевые переменные: одежда по частям тела
-y_head = data['Head_Clothing'].values
-y_arms = data['Arms_Clothing'].values
-y_neck = data['Neck_Clothing'].values
-y_body = data['Body_Clothing'].values
-y_legs = data['Legs_Clothing'].values
-y_shoes = data['Shoes_Clothing'].values
-
-# Кодирование целевых переменных
-le_head = LabelEncoder()
-le_arms = LabelEncoder()
-le_neck = LabelEncoder()
-le_body = LabelEncoder()
-le_legs = LabelEncoder()
-le_shoes = LabelEncoder()
-
-def check_unique(values, le, category_name):
-    if len(set(values)) < 2:
-        raise ValueError(f"Категория '{category_name}' должна содержать как минимум два уникальных значения для кодирования.")
-    return le.fit_transform(values)
-
-y_head_enc = check_unique(y_head, le_head, 'Head_Clothing')
-y_arms_enc = check_unique(y_arms, le_arms, 'Arms_Clothing')
-y_neck_enc = check_unique(y_neck, le_neck, 'Neck_Clothing')
-y_body_enc = check_unique(y_body, le_body, 'Body_Clothing')
-y_legs_enc = check_unique(y_legs, le_legs, 'Legs_Clothing')
-y_shoes_enc = check_unique(y_shoes, le_shoes, 'Shoes_Clothing')
-
-num_classes_head = len(le_head.classes_)
-num_classes_arms = len(le_arms.classes_)
-num_classes_neck = len(le_neck.classes_)
-num_classes_body = len(le_body.classes_)
-num_classes_legs = len(le_legs.classes_)
-num_classes_shoes = len(le_shoes.classes_)
-
-y_head_cat = np.expand_dims(y_head_enc, axis=1)
-y_arms_cat = np.expand_dims(y_arms_enc, axis=1)
-y_neck_cat = np.expand_dims(y_neck_enc, axis=1)
-y_body_cat = np.expand_dims(y_body_enc, axis=1)
-y_legs_cat = np.expand_dims(y_legs_enc, axis=1)
-y_shoes_cat = np.expand_dims(y_shoes_enc, axis=1)
-
-# Нормализация входных данных
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Разделение на обучающую и тестовую выборки
-X_train, X_test, y_head_train, y_head_test, y_arms_train, y_arms_test, \
-y_neck_train, y_neck_test, y_body_train, y_body_test, \
-y_legs_train, y_legs_test, y_shoes_train, y_shoes_test = train_test_split(
-    X_scaled, y_head_cat, y_arms_cat, y_neck_cat, y_body_cat, y_legs_cat, y_shoes_cat,
-    test_size=0.2, random_state=42
-)
+def load_dataset(path='res.csv', use_cache=True):
+    """
+    Загружает закодированную выборку (из кэша dataset_cache, если он актуален) и делит её на train/test.
+
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test, scaler, encoders), где y_* -
+        словари часть тела -> массив меток формы (N, 1).
+    """
+    dataset = load_prepared(path, use_cache=use_cache)
+
+    # Разделение на обучающую и тестовую выборки
+    train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42)
+    X_train = np.asarray(dataset.features[train_idx])
+    X_test = np.asarray(dataset.features[test_idx])
+    return X_train, X_test, dataset.targets(train_idx), dataset.targets(test_idx), dataset.scaler, dataset.encoders
+
 
 # 2. Построение модели
-# Теперь входной слой имеет shape=(5,) вместо (3,)
-input_layer = Input(shape=(X_train.shape[1],), name='Input')
-
-dense1 = Dense(128, activation='relu', name='Dense_1')(input_layer)
-drop1 = Dropout(0.5, name='Dropout_1')(dense1)
-dense2 = Dense(64, activation='relu', name='Dense_2')(drop1)
-drop2 = Dropout(0.5, name='Dropout_2')(dense2)
-
-output_head = Dense(num_classes_head, activation='softmax', name='head')(drop2)
-output_arms = Dense(num_classes_arms, activation='softmax', name='arms')(drop2)
-output_neck = Dense(num_classes_neck, activation='softmax', name='neck')(drop2)
-output_body = Dense(num_classes_body, activation='softmax', name='body')(drop2)
-output_legs = Dense(num_classes_legs, activation='softmax', name='legs')(drop2)
-output_shoes = Dense(num_classes_shoes, activation='softmax', name='shoes')(drop2)
-
-model = Model(inputs=input_layer, outputs=[
-    output_head, output_arms, output_neck, output_body, output_legs, output_shoes
-])
-
-model.compile(
-    optimizer=Adam(learning_rate=0.001),
-    loss='sparse_categorical_crossentropy',
-    metrics={
-        'head': 'accuracy',
-        'arms': 'accuracy',
-        'neck': 'accuracy',
-        'body': 'accuracy',
-        'legs': 'accuracy',
-        'shoes': 'accuracy'
+
+def build_model(num_classes, n_features=len(FEATURE_COLUMNS), units=(128, 64), dropout=0.5, learning_rate=0.001):
+    """
+    Input(5) -> Dense(128) -> Dense(64) -> шесть softmax-голов.
+
+    Args:
+        num_classes (dict): Часть тела -> число классов.
+    """
+    input_layer = Input(shape=(n_features,), name='Input')
+
+    x = input_layer
+    for i, n_units in enumerate(units, start=1):
+        x = Dense(n_units, activation='relu', name=f'Dense_{i}')(x)
+        x = Dropout(dropout, name=f'Dropout_{i}')(x)
+
+    outputs = [Dense(num_classes[part], activation='softmax', name=part)(x) for part in BODY_PARTS]
+
+    model = Model(inputs=input_layer, outputs=outputs)
+    model.compile(
+        optimizer=Adam(learning_rate=learning_rate),
+        loss='sparse_categorical_crossentropy',
+        metrics={part: 'accuracy' for part in BODY_PARTS}
+    )
+    return model
+
+
+class ThroughputLogger(Callback):
+    """Печатает число обработанных примеров в секунду за эпоху."""
+
+    def __init__(self, n_examples):
+        super().__init__()
+        self.n_examples = n_examples
+        self.examples_per_sec = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._started
+        rate = self.n_examples / elapsed if elapsed else 0.0
+        self.examples_per_sec.append(rate)
+        if logs is not None:
+            logs['examples_per_sec'] = rate
+        print(f"Эпоха {epoch + 1}: {rate:,.0f} примеров/с ({elapsed:.1f} с)")
+
+
+# Потоковый режим: res.csv читается чанками через tf.data и не держится в памяти целиком
+
+def fit_streaming_preprocessors(path, chunk_size=200_000):
+    """
+    Первый проход по CSV чанками: собирает множества меток и обучает StandardScaler через partial_fit.
+
+    Returns:
+        tuple: (scaler, encoders, n_rows).
+    """
+    scaler = StandardScaler()
+    labels = {part: set() for part in BODY_PARTS}
+    n_rows = 0
+    for chunk in pd.read_csv(path, encoding='utf-8', chunksize=chunk_size):
+        chunk.fillna('', inplace=True)
+        chunk['Sex'] = chunk['Sex'].map(SEX_MAPPING)
+        scaler.partial_fit(chunk[FEATURE_COLUMNS].values)
+        for part in BODY_PARTS:
+            labels[part].update(chunk[LABEL_COLUMNS[part]].astype(str))
+        n_rows += len(chunk)
+
+    encoders = {}
+    for part in BODY_PARTS:
+        encoders[part] = LabelEncoder()
+        check_unique(sorted(labels[part]), encoders[part], LABEL_COLUMNS[part])
+    return scaler, encoders, n_rows
+
+
+def split_of(index):
+    """Детерминированное разбиение строк по номеру: 10% test, 10% validation, 80% train."""
+    return tf.where(index % 10 == 0, 2, tf.where(index % 10 == 1, 1, 0))
+
+
+def make_streaming_dataset(path, scaler, encoders, split, batch_size=1024, shuffle_buffer=100_000, seed=42):
+    """
+    tf.data-конвейер: строки CSV -> батчи -> параллельный decode_csv -> масштабирование -> prefetch.
+
+    Args:
+        split (int): 0 - train, 1 - validation, 2 - test (см. split_of).
+    """
+    with open(path, encoding='utf-8') as f:
+        header = f.readline().strip().split(',')
+    columns = {name: i for i, name in enumerate(header)}
+    numeric = set(FEATURE_COLUMNS) - {'Sex'}
+    record_defaults = [[0.0] if name in numeric else [''] for name in header]
+
+    mean = tf.constant(scaler.mean_, dtype=tf.float32)
+    scale = tf.constant(scaler.scale_, dtype=tf.float32)
+    tables = {
+        part: tf.lookup.StaticHashTable(
+            tf.lookup.KeyValueTensorInitializer(
+                tf.constant([str(c) for c in encoders[part].classes_]),
+                tf.range(len(encoders[part].classes_), dtype=tf.int64),
+            ),
+            default_value=-1,
+        )
+        for part in BODY_PARTS
     }
-)
 
-model.summary()
+    def parse(lines):
+        fields = tf.io.decode_csv(lines, record_defaults=record_defaults)
+        sex = tf.cast(tf.equal(fields[columns['Sex']], 'female'), tf.float32)
+        features = tf.stack([
+            sex if name == 'Sex' else tf.cast(fields[columns[name]], tf.float32)
+            for name in FEATURE_COLUMNS
+        ], axis=1)
+        targets = {part: tables[part].lookup(fields[columns[LABEL_COLUMNS[part]]]) for part in BODY_PARTS}
+        return (features - mean) / scale, targets
+
+    ds = tf.data.TextLineDataset(path).skip(1).enumerate()
+    ds = ds.filter(lambda i, line: tf.equal(split_of(i), split)).map(lambda i, line: line)
+    if split == 0 and shuffle_buffer:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    ds = ds.map(parse, num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+    return ds.prefetch(tf.data.AUTOTUNE)
 
-# 4. Обучение модели
-early_stop = EarlyStopping(
-    monitor='val_loss',
-    patience=10,
-    restore_best_weights=True
-)
 
-history = model.fit(
-    X_train,
-    {
-        'head': y_head_train,
-        'arms': y_arms_train,
-        'neck': y_neck_train,
-        'body': y_body_train,
-        'legs': y_legs_train,
-        'shoes': y_shoes_train
-    },
-    epochs=200,
-    batch_size=32,
-    validation_split=0.2,
-    callbacks=[early_stop],
-    verbose=1
-)
+# 6. Визуализация обучения
 
-# 5. Оценка модели
-results = model.evaluate(X_test, {
-    'head': y_head_test,
-    'arms': y_arms_test,
-    'neck': y_neck_test,
-    'body': y_body_test,
-    'legs': y_legs_test,
-    'shoes': y_shoes_test
-}, verbose=0)
-
-print(f"Test Loss: {results[0]:.4f}")
-print(f"Head Accuracy: {results[1]:.4f}")
-print(f"Arms Accuracy: {results[2]:.4f}")
-print(f"Neck Accuracy: {results[3]:.4f}")
-print(f"Body Accuracy: {results[4]:.4f}")
-print(f"Legs Accuracy: {results[5]:.4f}")
-print(f"Shoes Accuracy: {results[6]:.4f}")
+def plot_history(history, show=True, output_dir=None):
+    """Графики потерь и точности по головам; при output_dir сохраняются в PNG."""
+    if not history.history.get('loss'):
+        # Например, --incremental без изменившихся голов и с --finetune-epochs 0
+        print('Нет эпох обучения, графики не строятся')
+        return
+    for metric, title, ylabel, label in [
+        ('loss', 'Потери', 'Потери', 'Loss'),
+        ('accuracy', 'Точность', 'Точность', 'Accuracy'),
+    ]:
+        fig = plt.figure(figsize=(18, 12))
+        for i, part in enumerate(BODY_PARTS, start=1):
+            plt.subplot(3, 2, i)
+            plt.plot(history.history[f'{part}_{metric}'], label=f'Train {part.capitalize()} {label}')
+            plt.plot(history.history[f'val_{part}_{metric}'], label=f'Val {part.capitalize()} {label}')
+            plt.title(f'{title} {part.capitalize()}')
+            plt.xlabel('Эпоха')
+            plt.ylabel(ylabel)
+            plt.legend()
+        plt.tight_layout()
+        if output_dir:
+            fig.savefig(os.path.join(output_dir, f'{metric}.png'))
+        if show:
+            plt.show()
+        plt.close(fig)
 
-# 6. Визуализация обучения
-plt.figure(figsize=(18, 12))
-
-plt.subplot(3, 2, 1)
-plt.plot(history.history['head_loss'], label='Train Head Loss')
-plt.plot(history.history['val_head_loss'], label='Val Head Loss')
-plt.title('Потери Head')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.subplot(3, 2, 2)
-plt.plot(history.history['arms_loss'], label='Train Arms Loss')
-plt.plot(history.history['val_arms_loss'], label='Val Arms Loss')
-plt.title('Потери Arms')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.subplot(3, 2, 3)
-plt.plot(history.history['neck_loss'], label='Train Neck Loss')
-plt.plot(history.history['val_neck_loss'], label='Val Neck Loss')
-plt.title('Потери Neck')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.subplot(3, 2, 4)
-plt.plot(history.history['body_loss'], label='Train Body Loss')
-plt.plot(history.history['val_body_loss'], label='Val Body Loss')
-plt.title('Потери Body')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.subplot(3, 2, 5)
-plt.plot(history.history['legs_loss'], label='Train Legs Loss')
-plt.plot(history.history['val_legs_loss'], label='Val Legs Loss')
-plt.title('Потери Legs')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.subplot(3, 2, 6)
-plt.plot(history.history['shoes_loss'], label='Train Shoes Loss')
-plt.plot(history.history['val_shoes_loss'], label='Val Shoes Loss')
-plt.title('Потери Shoes')
-plt.xlabel('Эпоха')
-plt.ylabel('Потери')
-plt.legend()
-
-plt.tight_layout()
-plt.show()
-
-plt.figure(figsize=(18, 12))
-
-plt.subplot(3, 2, 1)
-plt.plot(history.history['head_accuracy'], label='Train Head Accuracy')
-plt.plot(history.history['val_head_accuracy'], label='Val Head Accuracy')
-plt.title('Точность Head')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.subplot(3, 2, 2)
-plt.plot(history.history['arms_accuracy'], label='Train Arms Accuracy')
-plt.plot(history.history['val_arms_accuracy'], label='Val Arms Accuracy')
-plt.title('Точность Arms')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.subplot(3, 2, 3)
-plt.plot(history.history['neck_accuracy'], label='Train Neck Accuracy')
-plt.plot(history.history['val_neck_accuracy'], label='Val Neck Accuracy')
-plt.title('Точность Neck')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.subplot(3, 2, 4)
-plt.plot(history.history['body_accuracy'], label='Train Body Accuracy')
-plt.plot(history.history['val_body_accuracy'], label='Val Body Accuracy')
-plt.title('Точность Body')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.subplot(3, 2, 5)
-plt.plot(history.history['legs_accuracy'], label='Train Legs Accuracy')
-plt.plot(history.history['val_legs_accuracy'], label='Val Legs Accuracy')
-plt.title('Точность Legs')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.subplot(3, 2, 6)
-plt.plot(history.history['shoes_accuracy'], label='Train Shoes Accuracy')
-plt.plot(history.history['val_shoes_accuracy'], label='Val Shoes Accuracy')
-plt.title('Точность Shoes')
-plt.xlabel('Эпоха')
-plt.ylabel('Точность')
-plt.legend()
-
-plt.tight_layout()
-plt.show()
 
 # 7. Сохранение модели и препроцессоров
-model.save('clothing_recommendation_model.h5')
-
-with open('scaler.pkl', 'wb') as f:
-    pickle.dump(scaler, f)
-
-with open('label_encoders.pkl', 'wb') as f:
-    pickle.dump({
-        'head': le_head,
-        'arms': le_arms,
-        'neck': le_neck,
-        'body': le_body,
-        'legs': le_legs,
-        'shoes': le_shoes
-    }, f)
+
+def save_artifacts(model, scaler, encoders, prefix='clothing_recommendation_model'):
+    model.save(f'{prefix}.h5')
+
+    with open('scaler.pkl', 'wb') as f:
+        pickle.dump(scaler, f)
+
+    with open('label_encoders.pkl', 'wb') as f:
+        pickle.dump(encoders, f)
+
+    # 8. Экспорт единого артефакта для сервера: веса, параметры scaler и таблицы классов
+    # в одном mmap-файле (формат описан в ww-api/app/artifact.py)
+    artifact_version = write_artifact(
+        f'{prefix}.wwm',
+        {layer.name: layer.get_weights() for layer in model.layers if isinstance(layer, Dense)},
+        scaler.mean_,
+        scaler.scale_,
+        {part: encoders[part].classes_ for part in BODY_PARTS}
+    )
+    print(f"Артефакт '{prefix}.wwm' записан, версия {artifact_version}")
+
+
+def print_results(results):
+    print(f"Test Loss: {results[0]:.4f}")
+    for i, part in enumerate(BODY_PARTS, start=1):
+        print(f"{part.capitalize()} Accuracy: {results[i]:.4f}")
+
+
+def train_in_memory(args):
+    X_train, X_test, y_train, y_test, scaler, encoders = load_dataset(args.data, use_cache=not args.no_cache)
+    num_classes = {part: len(encoders[part].classes_) for part in BODY_PARTS}
+
+    model = build_model(num_classes, n_features=X_train.shape[1])
+    model.summary()
+
+    # 4. Обучение модели
+    early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
+    throughput = ThroughputLogger(int(len(X_train) * 0.8))
+
+    history = model.fit(
+        X_train,
+        y_train,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        validation_split=0.2,
+        callbacks=[early_stop, throughput],
+        verbose=1
+    )
+
+    # 5. Оценка модели
+    results = model.evaluate(X_test, y_test, verbose=0)
+    return model, history, results, scaler, encoders
+
+
+def train_streaming(args):
+    scaler, encoders, n_rows = fit_streaming_preprocessors(args.data, args.chunk_size)
+    num_classes = {part: len(encoders[part].classes_) for part in BODY_PARTS}
+    print(f"Строк в '{args.data}': {n_rows}")
+
+    def dataset(split):
+        return make_streaming_dataset(
+            args.data, scaler, encoders, split,
+            batch_size=args.batch_size, shuffle_buffer=args.shuffle_buffer
+        )
+
+    model = build_model(num_classes)
+    model.summary()
+
+    early_stop = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
+    # Строки с номером 0 и 1 по модулю 10 уходят в test и validation
+    n_train = n_rows - (n_rows + 9) // 10 - (n_rows + 8) // 10
+    throughput = ThroughputLogger(n_train)
+
+    history = model.fit(
+        dataset(0),
+        validation_data=dataset(1),
+        epochs=args.epochs,
+        callbacks=[early_stop, throughput],
+        verbose=1
+    )
+
+    results = model.evaluate(dataset(2), verbose=0)
+    return model, history, results, scaler, encoders
+
+
+# Дообучение после изменения каталога: общий ствол сохраняется, переучиваются только изменившиеся головы
+
+def remap_head(old_weights, old_classes, new_weights, new_classes):
+    """
+    Переносит веса головы на новый набор классов.
+
+    Столбцы классов, которые есть и в старом, и в новом наборе, копируются;
+    новые классы сохраняют начальную инициализацию свежего слоя.
+    """
+    old_kernel, old_bias = old_weights
+    kernel, bias = (w.copy() for w in new_weights)
+    old_index = {c: i for i, c in enumerate(old_classes)}
+    for j, c in enumerate(new_classes):
+        i = old_index.get(c)
+        if i is not None:
+            kernel[:, j] = old_kernel[:, i]
+            bias[j] = old_bias[i]
+    return [kernel, bias]
+
+
+def merge_histories(*histories):
+    merged = {}
+    for history in histories:
+        for key, values in history.history.items():
+            merged.setdefault(key, []).extend(values)
+    return SimpleNamespace(history=merged)
+
+
+def train_incremental(args):
+    """
+    Тёплый старт от сохранённой модели.
+
+    1. Ствол Dense_1/Dense_2 и головы с прежним набором классов берутся из старой модели.
+    2. Головы, у которых изменился набор классов, пересоздаются нужного размера
+       (веса сохранившихся классов переносятся) и обучаются при замороженном остальном.
+    3. Вся сеть коротко дообучается с маленьким шагом.
+
+    Признаки масштабируются прежним scaler, на который настроен ствол.
+    """
+    base_model = load_model(args.base_model)
+    with open(args.base_scaler, 'rb') as f:
+        base_scaler = pickle.load(f)
+    with open(args.base_encoders, 'rb') as f:
+        base_encoders = pickle.load(f)
+
+    X_train, X_test, y_train, y_test, scaler, encoders = load_dataset(args.data, use_cache=not args.no_cache)
+    # Пересчёт признаков из нового масштаба в масштаб исходной модели
+    X_train, X_test = (
+        ((X * scaler.scale_ + scaler.mean_ - base_scaler.mean_) / base_scaler.scale_).astype(np.float32)
+        for X in (X_train, X_test)
+    )
+
+    changed = [
+        part for part in BODY_PARTS
+        if list(base_encoders[part].classes_) != list(encoders[part].classes_)
+    ]
+    print(f"Изменились головы: {', '.join(changed) if changed else 'нет'}")
+
+    num_classes = {part: len(encoders[part].classes_) for part in BODY_PARTS}
+    units = tuple(base_model.get_layer(name).units for name in TRUNK_LAYERS)
+    model = build_model(num_classes, n_features=X_train.shape[1], units=units)
+    for name in TRUNK_LAYERS:
+        model.get_layer(name).set_weights(base_model.get_layer(name).get_weights())
+    for part in BODY_PARTS:
+        layer = model.get_layer(part)
+        if part in changed:
+            layer.set_weights(remap_head(
+                base_model.get_layer(part).get_weights(), base_encoders[part].classes_,
+                layer.get_weights(), encoders[part].classes_
+            ))
+        else:
+            layer.set_weights(base_model.get_layer(part).get_weights())
+
+    throughput = ThroughputLogger(int(len(X_train) * 0.8))
+    histories = []
+
+    def fit(epochs, learning_rate):
+        model.compile(
+            optimizer=Adam(learning_rate=learning_rate),
+            loss='sparse_categorical_crossentropy',
+            metrics={part: 'accuracy' for part in BODY_PARTS}
+        )
+        early_stop = EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)
+        histories.append(model.fit(
+            X_train,
+            y_train,
+            epochs=epochs,
+            batch_size=args.batch_size,
+            validation_split=0.2,
+            callbacks=[early_stop, throughput],
+            verbose=1
+        ))
+
+    if changed and args.head_epochs:
+        for layer in model.layers:
+            layer.trainable = layer.name in changed
+        fit(args.head_epochs, 0.001)
+
+    for layer in model.layers:
+        layer.trainable = True
+    if args.finetune_epochs:
+        fit(args.finetune_epochs, args.finetune_learning_rate)
+
+    results = model.evaluate(X_test, y_test, verbose=0)
+    return model, merge_histories(*histories), results, base_scaler, encoders
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Обучение модели рекомендаций одежды')
+    parser.add_argument('--data', default='res.csv')
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='Размер батча (по умолчанию 32, в потоковом режиме 1024)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Не использовать кэш предобработанной выборки (res.cache/)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Читать выборку чанками через tf.data, не загружая её в память')
+    parser.add_argument('--shuffle-buffer', type=int, default=100_000, help='Буфер перемешивания (потоковый режим)')
+    parser.add_argument('--chunk-size', type=int, default=200_000, help='Строк в чанке первого прохода (потоковый режим)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Дообучить сохранённую модель после изменения каталога вместо обучения с нуля')
+    parser.add_argument('--base-model', default='clothing_recommendation_model.h5')
+    parser.add_argument('--base-scaler', default='scaler.pkl')
+    parser.add_argument('--base-encoders', default='label_encoders.pkl')
+    parser.add_argument('--head-epochs', type=int, default=10, help='Эпох обучения изменившихся голов (инкрементальный режим)')
+    parser.add_argument('--finetune-epochs', type=int, default=3, help='Эпох дообучения всей сети (инкрементальный режим)')
+    parser.add_argument('--finetune-learning-rate', type=float, default=1e-4)
+    parser.add_argument('--no-plots', action='store_true', help='Не показывать графики обучения')
+    args = parser.parse_args()
+    if args.streaming and args.incremental:
+        parser.error('--incremental is not supported with --streaming')
+    if args.batch_size is None:
+        args.batch_size = 1024 if args.streaming else 32
+
+    if args.streaming:
+        model, history, results, scaler, encoders = train_streaming(args)
+    elif args.incremental:
+        model, history, results, scaler, encoders = train_incremental(args)
+    else:
+        model, history, results, scaler, encoders = train_in_memory(args)
+
+    print_results(results)
+    if not args.no_plots:
+        plot_history(history)
+    save_artifacts(model, scaler, encoders)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Параллельный перебор гиперпараметров модели рекомендаций без GUI.
+
+Каждая конфигурация обучается в отдельном процессе пула с ограниченным числом
+потоков TensorFlow (--threads на воркер), чтобы воркеры не дрались за ядра.
+Для каждого прогона в <out>/<run_id>/ пишутся:
+
+    metrics.json   гиперпараметры, точность по частям тела, размер модели, задержка
+    history.json   кривые потерь и точности по эпохам
+    loss.png, accuracy.png
+    model.h5
+
+В <out>/leaderboard.csv и <out>/leaderboard.md - сводка, отсортированная по
+средней точности; с --min-accuracy первым идёт самый быстрый прогон, чья
+средняя точность не ниже порога.
+
+Пример:
+    python sweep.py --units 128,64 64,32 256,128 --dropout 0.3 0.5 \\
+        --learning-rate 0.001 0.003 --batch-size 32 256 --workers 4 --threads 2
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from dataset_cache import BODY_PARTS, default_cache_dir, load_dataset as load_prepared
+
+LEADERBOARD_FIELDS = [
+    'run_id', 'units', 'dropout', 'learning_rate', 'batch_size', 'epochs_trained',
+    'mean_accuracy', 'min_accuracy', 'test_loss', 'params', 'model_bytes',
+    'latency_single_ms', 'latency_batch_ms', 'train_seconds',
+]
+
+
+def _init_worker(threads):
+    """Ограничивает потоки BLAS и TensorFlow до импорта tensorflow в воркере."""
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    os.environ['MPLBACKEND'] = 'Agg'
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_id_of(config):
+    units = 'x'.join(str(u) for u in config['units'])
+    return f"u{units}_d{config['dropout']}_lr{config['learning_rate']}_b{config['batch_size']}"
+
+
+def measure_latency(model, features, batch_size=256, repeats=50):
+    """Медианная задержка прямого прохода в мс: одна строка и батч batch_size строк."""
+    results = {}
+    for name, size in (('single', 1), ('batch', batch_size)):
+        x = np.ascontiguousarray(features[:size], dtype=np.float32)
+        model(x, training=False)
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model(x, training=False)
+            timings.append(time.perf_counter() - started)
+        results[name] = float(np.median(timings) * 1000.0)
+    return results
+
+
+def train_one(task):
+    """Обучает одну конфигурацию и возвращает строку лидерборда; ошибки не роняют весь перебор."""
+    config, args = task
+    run_id = run_id_of(config)
+    run_dir = os.path.join(args.out, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+
+    try:
+        from tensorflow.keras.callbacks import EarlyStopping
+        from sklearn.model_selection import train_test_split
+        from neiro import build_model, plot_history, ThroughputLogger
+
+        dataset = load_prepared(args.data, args.cache_dir)
+        train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42)
+        X_train = np.asarray(dataset.features[train_idx])
+        X_test = np.asarray(dataset.features[test_idx])
+
+        model = build_model(
+            dataset.num_classes(),
+            units=config['units'],
+            dropout=config['dropout'],
+            learning_rate=config['learning_rate'],
+        )
+        early_stop = EarlyStopping(monitor='val_loss', patience=args.patience, restore_best_weights=True)
+        throughput = ThroughputLogger(int(len(X_train) * 0.8))
+
+        started = time.perf_counter()
+        history = model.fit(
+            X_train,
+            dataset.targets(train_idx),
+            epochs=args.epochs,
+            batch_size=config['batch_size'],
+            validation_split=0.2,
+            callbacks=[early_stop, throughput],
+            verbose=0
+        )
+        train_seconds = time.perf_counter() - started
+
+        results = model.evaluate(X_test, dataset.targets(test_idx), verbose=0, return_dict=True)
+        accuracy = {part: float(results[f'{part}_accuracy']) for part in BODY_PARTS}
+
+        model_path = os.path.join(run_dir, 'model.h5')
+        model.save(model_path)
+        latency = measure_latency(model, X_test, repeats=args.latency_repeats)
+
+        plot_history(history, show=False, output_dir=run_dir)
+        with open(os.path.join(run_dir, 'history.json'), 'w') as f:
+            json.dump({k: [float(v) for v in values] for k, values in history.history.items()}, f, indent=2)
+
+        row = {
+            'run_id': run_id,
+            'units': 'x'.join(str(u) for u in config['units']),
+            'dropout': config['dropout'],
+            'learning_rate': config['learning_rate'],
+            'batch_size': config['batch_size'],
+            'epochs_trained': len(history.history['loss']),
+            'mean_accuracy': float(np.mean(list(accuracy.values()))),
+            'min_accuracy': min(accuracy.values()),
+            'test_loss': float(results['loss']),
+            'params': int(model.count_params()),
+            'model_bytes': os.path.getsize(model_path),
+            'latency_single_ms': latency['single'],
+            'latency_batch_ms': latency['batch'],
+            'train_seconds': train_seconds,
+        }
+        metrics = dict(row, accuracy=accuracy, examples_per_sec=throughput.examples_per_sec)
+    except Exception as exc:
+        metrics = {'run_id': run_id, 'config': config, 'error': repr(exc)}
+        row = None
+
+    with open(os.path.join(run_dir, 'metrics.json'), 'w') as f:
+        json.dump(metrics, f, indent=2)
+    return row, metrics.get('error')
+
+
+def rank(rows, min_accuracy=None):
+    """
+    По убыванию средней точности; при min_accuracy прогоны, прошедшие порог,
+    идут первыми по возрастанию задержки одной строки.
+    """
+    if min_accuracy is None:
+        return sorted(rows, key=lambda r: (-r['mean_accuracy'], r['latency_single_ms']))
+    passed = sorted((r for r in rows if r['mean_accuracy'] >= min_accuracy), key=lambda r: r['latency_single_ms'])
+    failed = sorted((r for r in rows if r['mean_accuracy'] < min_accuracy), key=lambda r: -r['mean_accuracy'])
+    return passed + failed
+
+
+def write_leaderboard(rows, out_dir):
+    with open(os.path.join(out_dir, 'leaderboard.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    lines = [
+        '| # | run | mean acc | min acc | params | size, KB | 1 row, ms | 256 rows, ms | train, s |',
+        '|---|-----|----------|---------|--------|----------|-----------|--------------|----------|',
+    ]
+    for i, r in enumerate(rows, start=1):
+        lines.append(
+            f"| {i} | {r['run_id']} | {r['mean_accuracy']:.4f} | {r['min_accuracy']:.4f} | {r['params']} | "
+            f"{r['model_bytes'] / 1024:.0f} | {r['latency_single_ms']:.3f} | {r['latency_batch_ms']:.3f} | "
+            f"{r['train_seconds']:.0f} |"
+        )
+    with open(os.path.join(out_dir, 'leaderboard.md'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Параллельный перебор гиперпараметров модели одежды')
+    parser.add_argument('--data', default='res.csv')
+    parser.add_argument('--cache-dir', default=None, help='Кэш выборки (по умолчанию res.cache/)')
+    parser.add_argument('--out', default='sweeps')
+    parser.add_argument('--units', nargs='+', default=['128,64'], help='Размеры скрытых слоёв, например 128,64 64,32')
+    parser.add_argument('--dropout', nargs='+', type=float, default=[0.5])
+    parser.add_argument('--learning-rate', nargs='+', type=float, default=[0.001])
+    parser.add_argument('--batch-size', nargs='+', type=int, default=[32])
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--patience', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--threads', type=int, default=1, help='Потоков TensorFlow на воркер')
+    parser.add_argument('--latency-repeats', type=int, default=50)
+    parser.add_argument('--min-accuracy', type=float, default=None,
+                        help='Порог средней точности: лидирует самый быстрый прогон, прошедший его')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    # Кэш выборки строится один раз до старта воркеров; они открывают его через mmap
+    load_prepared(args.data, args.cache_dir or default_cache_dir(args.data))
+
+    configs = [
+        {'units': [int(u) for u in units.split(',')], 'dropout': dropout,
+         'learning_rate': learning_rate, 'batch_size': batch_size}
+        for units, dropout, learning_rate, batch_size
+        in itertools.product(args.units, args.dropout, args.learning_rate, args.batch_size)
+    ]
+    print(f"Конфигураций: {len(configs)}, воркеров: {args.workers}, потоков на воркер: {args.threads}")
+
+    rows = []
+    # spawn: TensorFlow не переживает fork после инициализации
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(args.threads,), maxtasksperchild=1) as pool:
+        for row, error in pool.imap_unordered(train_one, [(config, args) for config in configs]):
+            if error:
+                print(f"Ошибка: {error}")
+                continue
+            rows.append(row)
+            print(f"{row['run_id']}: mean acc {row['mean_accuracy']:.4f}, 1 row {row['latency_single_ms']:.3f} ms")
+
+    rows = rank(rows, args.min_accuracy)
+    write_leaderboard(rows, args.out)
+    if rows:
+        print(f"Лучший прогон: {rows[0]['run_id']} (см. {os.path.join(args.out, 'leaderboard.md')})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import numpy as np
 import pickle
+import threading
 from tensorflow.keras.models import load_model
 import random
 import pandas as pd
@@ -26,6 +27,110 @@ def read_input_data():
     
     return input_data_list
 
+# Порядок выходов модели: [head, arms, neck, body, legs, shoes]
+BODY_PARTS = ['head', 'arms', 'neck', 'body', 'legs', 'shoes']
+
+# Преобразование пола в числовой формат: 'male' -> 0, 'female' -> 1
+SEX_MAPPING = {'male': 0, 'female': 1}
+
+
+class ClothingPredictor:
+    """
+    Держит модель, скейлер и энкодеры в памяти и предсказывает комплекты одежды.
+
+    Артефакты загружаются лениво при первом предсказании и переиспользуются
+    всеми последующими вызовами.
+    """
+
+    def __init__(self, model_path='clothing_recommendation_model.h5',
+                 scaler_path='scaler.pkl', encoders_path='label_encoders.pkl'):
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.encoders_path = encoders_path
+        self.model = None
+        self.scaler = None
+        self.le_dict = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Загружает артефакты, если они ещё не загружены."""
+        if self.model is not None:
+            return self
+        with self._lock:
+            if self.model is None:
+                with open(self.scaler_path, 'rb') as f:
+                    self.scaler = pickle.load(f)
+                with open(self.encoders_path, 'rb') as f:
+                    self.le_dict = pickle.load(f)
+                self.model = load_model(self.model_path)
+        return self
+
+    @staticmethod
+    def to_row(inputData):
+        """
+        Извлекает признаки из inputData в порядке [Temperature, Wind_Speed, Precipitation, Sex, Age].
+        """
+        temperature = inputData.get('Temperature')
+        wind_speed = inputData.get('Wind_Speed')
+        precipitation = inputData.get('Precipitation')
+        sex = inputData.get('Sex')
+        age = inputData.get('Age')
+
+        # Проверка наличия всех необходимых признаков
+        if temperature is None or wind_speed is None or precipitation is None or sex is None or age is None:
+            raise ValueError("Input data must contain Temperature, Wind_Speed, Precipitation, Sex, and Age.")
+
+        sex_numeric = SEX_MAPPING.get(sex.lower())
+        if sex_numeric is None:
+            raise ValueError("Sex must be either 'male' or 'female'.")
+
+        return [temperature, wind_speed, precipitation, sex_numeric, age]
+
+    def predict_many(self, input_data_list):
+        """
+        Предсказывает комплекты одежды для списка входных данных одним вызовом модели.
+
+        Args:
+            input_data_list (list): Словари с Temperature, Wind_Speed, Precipitation, Sex, Age.
+
+        Returns:
+            list: Рекомендованные комплекты одежды в порядке входа.
+        """
+        if not input_data_list:
+            return []
+        self.load()
+
+        input_array = np.array([self.to_row(inputData) for inputData in input_data_list], dtype=float)
+
+        # Масштабирование входных данных
+        try:
+            input_scaled = self.scaler.transform(input_array)
+        except ValueError as e:
+            raise ValueError(f"Ошибка при масштабировании данных: {e}")
+
+        # Предсказание модели
+        predictions = self.model.predict(input_scaled, verbose=0)
+
+        # Декодирование предсказаний обратно в наименования одежды
+        decoded = [
+            self.le_dict[part].inverse_transform(np.argmax(pred, axis=1))
+            for part, pred in zip(BODY_PARTS, predictions)
+        ]
+
+        outfits = []
+        for i in range(len(input_array)):
+            complete_outfit = [column[i] for column in decoded]
+            # Удаление пустых рекомендаций, если они есть
+            outfits.append([item for item in complete_outfit if item and item.strip()])
+        return outfits
+
+    def predict(self, inputData):
+        return self.predict_many([inputData])[0]
+
+
+default_predictor = ClothingPredictor()
+
+
 def predict_clothing_recommendation_from_data(inputData):
     """
     Извлекает данные из inputData, предобрабатывает их и предсказывает комплект одежды.
@@ -36,77 +141,7 @@ def predict_clothing_recommendation_from_data(inputData):
     Returns:
         list: Рекомендованный комплект одежды.
     """
-    # Извлечение признаков из inputData
-    temperature = inputData.get('Temperature')
-    wind_speed = inputData.get('Wind_Speed')
-    precipitation = inputData.get('Precipitation')
-    sex = inputData.get('Sex')
-    age = inputData.get('Age')
-    
-    # Проверка наличия всех необходимых признаков
-    if temperature is None or wind_speed is None or precipitation is None or sex is None or age is None:
-        raise ValueError("Input data must contain Temperature, Wind_Speed, Precipitation, Sex, and Age.")
-    
-    # Преобразование пола в числовой формат: 'male' -> 0, 'female' -> 1
-    sex_mapping = {'male': 0, 'female': 1}
-    sex_numeric = sex_mapping.get(sex.lower())
-    if sex_numeric is None:
-        raise ValueError("Sex must be either 'male' or 'female'.")
-    
-    # Создание массива входных данных в нужном формате
-    # Порядок признаков: [Temperature, Wind_Speed, Precipitation, Sex, Age]
-    input_array = np.array([[temperature, wind_speed, precipitation, sex_numeric, age]])
-    
-    # Загрузка скейлера
-    with open('scaler.pkl', 'rb') as f:
-        scaler = pickle.load(f)
-    
-    # Масштабирование входных данных
-    try:
-        input_scaled = scaler.transform(input_array)
-    except ValueError as e:
-        raise ValueError(f"Ошибка при масштабировании данных: {e}")
-    
-    # Загрузка модели
-    model = load_model('clothing_recommendation_model.h5')
-    
-    # Загрузка энкодеров
-    with open('label_encoders.pkl', 'rb') as f:
-        le_dict = pickle.load(f)
-    
-    # Предсказание модели
-    predictions = model.predict(input_scaled)
-    
-    # Извлечение предсказаний для каждой категории одежды
-    head_pred = np.argmax(predictions[0], axis=1)
-    arms_pred = np.argmax(predictions[1], axis=1)
-    neck_pred = np.argmax(predictions[2], axis=1)
-    body_pred = np.argmax(predictions[3], axis=1)
-    legs_pred = np.argmax(predictions[4], axis=1)
-    shoes_pred = np.argmax(predictions[5], axis=1)
-    
-    # Декодирование предсказаний обратно в наименования одежды
-    head_recommend = le_dict['head'].inverse_transform(head_pred)
-    arms_recommend = le_dict['arms'].inverse_transform(arms_pred)
-    neck_recommend = le_dict['neck'].inverse_transform(neck_pred)
-    body_recommend = le_dict['body'].inverse_transform(body_pred)
-    legs_recommend = le_dict['legs'].inverse_transform(legs_pred)
-    shoes_recommend = le_dict['shoes'].inverse_transform(shoes_pred)
-    
-    # Формирование итогового комплекта одежды
-    complete_outfit = [
-        head_recommend[0],
-        arms_recommend[0],
-        neck_recommend[0],
-        body_recommend[0],
-        legs_recommend[0],
-        shoes_recommend[0]
-    ]
-    
-    # Удаление пустых рекомендаций, если они есть
-    complete_outfit = [item for item in complete_outfit if item and item.strip()]
-    
-    return complete_outfit
+    return default_predictor.predict(inputData)
 
 if __name__ == "__main__":
     # Чтение данных из файла
@@ -0,0 +1,226 @@
+"""
+Нагрузочный бенчмарк ww-api.
+
+По умолчанию поднимает FastAPI-приложение в этом же процессе (httpx.ASGITransport,
+сеть не нужна); с --url стреляет по локальному uvicorn. Для каждого уровня
+параллелизма отправляет --requests запросов со смесью нагрузок --mix и пишет
+пропускную способность и p50/p95/p99 задержки в JSON, который можно сравнить
+с предыдущим прогоном через --compare.
+
+Примеры:
+    python tests/bench_api.py --concurrency 1,8,32 --requests 2000 --out bench.json
+    WW_BACKEND=artifact python tests/bench_api.py --mix predict=0.8,batch:64=0.2 --compare bench.json
+    python tests/bench_api.py --url http://127.0.0.1:800 --concurrency 64
+
+Требуется httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ww-api")
+
+
+def random_payload(rng):
+    return {
+        "Temperature": round(rng.uniform(-40, 40), 1),
+        "Wind_Speed": round(rng.uniform(0, 30), 1),
+        "Precipitation": rng.choice([0.0, 0.0, 0.0, 1.0, 2.5]),
+        "Sex": rng.choice(["male", "female"]),
+        "Age": rng.randint(18, 65),
+    }
+
+
+def parse_mix(spec):
+    """
+    Разбирает смесь нагрузок вида "predict=0.9,batch:64=0.1".
+
+    Returns:
+        list: Пары (вид нагрузки, вес); batch:N - /predict/batch из N записей.
+    """
+    mix = []
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind != "predict" and not kind.startswith("batch"):
+            raise ValueError(f"Unknown workload: {kind!r}")
+        mix.append((kind, float(weight) if weight else 1.0))
+    return mix
+
+
+def make_request(kind, rng):
+    if kind == "predict":
+        return "/predict", random_payload(rng), 1
+    size = int(kind.partition(":")[2] or 32)
+    return "/predict/batch", [random_payload(rng) for _ in range(size)], size
+
+
+def percentile(sorted_values, p):
+    """Перцентиль по методу ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(p / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+def summarize(latencies, errors, rows, elapsed, concurrency):
+    latencies = sorted(latencies)
+    ms = [value * 1000.0 for value in latencies]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rows": rows,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "rows_per_s": rows / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(ms) / len(ms) if ms else 0.0,
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "p99": percentile(ms, 99),
+            "max": ms[-1] if ms else 0.0,
+        },
+    }
+
+
+async def run_level(client, concurrency, total, mix, seed):
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix)
+    plan = [make_request(kind, rng) for kind in rng.choices(kinds, weights=weights, k=total)]
+    latencies, errors, rows = [], 0, 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors, rows
+        while next_index < len(plan):
+            path, payload, size = plan[next_index]
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+                rows += size
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, rows, time.perf_counter() - started, concurrency)
+
+
+@asynccontextmanager
+async def open_client(url, timeout):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    # Приложение в этом же процессе: пути к модели относительны каталога ww-api
+    sys.path.insert(0, API_DIR)
+    os.chdir(API_DIR)
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            yield client
+
+
+async def wait_ready(client, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not become ready")
+
+
+async def run(args):
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    async with open_client(args.url, args.timeout) as client:
+        await wait_ready(client, args.ready_timeout)
+        if args.warmup:
+            await run_level(client, max(levels), args.warmup, mix, args.seed - 1)
+        results = []
+        for i, concurrency in enumerate(levels):
+            result = await run_level(client, concurrency, args.requests, mix, args.seed + i)
+            results.append(result)
+            latency = result["latency_ms"]
+            print(
+                f"c={concurrency:<4} rps={result['throughput_rps']:9.1f} rows/s={result['rows_per_s']:10.1f} "
+                f"p50={latency['p50']:7.2f}ms p95={latency['p95']:7.2f}ms p99={latency['p99']:7.2f}ms "
+                f"errors={result['errors']}"
+            )
+    return results
+
+
+def compare(baseline, current):
+    """Печатает изменение пропускной способности и p99 относительно прошлого прогона."""
+    before = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        rps = level["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        p99 = level["latency_ms"]["p99"] / old["latency_ms"]["p99"] - 1 if old["latency_ms"]["p99"] else 0.0
+        print(f"c={level['concurrency']:<4} throughput {rps:+.1%}  p99 {p99:+.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк ww-api")
+    parser.add_argument("--url", help="Адрес запущенного сервера; без него приложение поднимается в процессе")
+    parser.add_argument("--concurrency", default="1,8,32", help="Уровни параллелизма через запятую")
+    parser.add_argument("--requests", type=int, default=1000, help="Запросов на каждый уровень")
+    parser.add_argument("--mix", default="predict", help='Смесь нагрузок, например "predict=0.9,batch:64=0.1"')
+    parser.add_argument("--warmup", type=int, default=100, help="Запросов прогрева перед замерами")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--out", help="Куда записать результаты в JSON")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    out_path = os.path.abspath(args.out) if args.out else None
+
+    levels = asyncio.run(run(args))
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": args.url or "in-process",
+        "backend": os.getenv("WW_BACKEND", "keras"),
+        "mix": args.mix,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "levels": levels,
+    }
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline:
+        compare(baseline, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Бенчмарк сериализации ответов и разбора тел запросов ww-api без модели и сети.
+
+Сравнивает прежний путь FastAPI (jsonable_encoder + json.dumps в JSONResponse)
+с orjson и msgpack на ответах /predict/batch разного размера, а также
+разбор тела запроса json / orjson / msgpack. Печатает медианное время
+на запрос и размер тела.
+
+Пример:
+    python tests/bench_serialization.py --sizes 1,100,10000 --repeats 200
+
+Требуются fastapi, orjson и msgpack.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+import msgpack
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+BODY_PARTS = ("head", "arms", "neck", "body", "legs", "shoes")
+ITEMS = {
+    "head": ["Шапка", "Кепка", "Панама", ""],
+    "arms": ["Перчатки", ""],
+    "neck": ["Шарф", ""],
+    "body": ["Пуховик", "Куртка", "Футболка", "Рубашка"],
+    "legs": ["Тёплые брюки", "Джинсы", "Шорты"],
+    "shoes": ["Зимние ботинки", "Кроссовки", "Сандалии"],
+}
+
+
+def make_outfits(n, rng):
+    return [[rng.choice(ITEMS[part]) for part in BODY_PARTS] for _ in range(n)]
+
+
+def legacy_response(outfits):
+    """Формат до структурированных полей: одна строка через запятую."""
+    return {"results": [{"recommendation": ", ".join(item for item in outfit if item)} for outfit in outfits]}
+
+
+def structured_response(outfits):
+    return {"results": [{
+        "recommendation": ", ".join(item for item in outfit if item),
+        "outfit": {part: item or None for part, item in zip(BODY_PARTS, outfit)},
+    } for outfit in outfits]}
+
+
+def fastapi_default(content):
+    """Что делает FastAPI для dict-ответа с JSONResponse по умолчанию."""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+ENCODERS = {
+    "json (fastapi default)": fastapi_default,
+    "orjson": orjson.dumps,
+    "msgpack": msgpack.packb,
+}
+
+DECODERS = {
+    "json": (lambda obj: json.dumps(obj).encode(), json.loads),
+    "orjson": (orjson.dumps, orjson.loads),
+    "msgpack": (msgpack.packb, msgpack.unpackb),
+}
+
+
+def median_ms(fn, arg, repeats):
+    fn(arg)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сериализации ww-api")
+    parser.add_argument("--sizes", default="1,100,10000", help="Число записей в ответе через запятую")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("Ответы:")
+    for size in (int(s) for s in args.sizes.split(",")):
+        outfits = make_outfits(size, rng)
+        baseline = None
+        for shape, build in (("legacy", legacy_response), ("structured", structured_response)):
+            content = build(outfits)
+            for name, encode in ENCODERS.items():
+                ms = median_ms(encode, content, args.repeats)
+                baseline = baseline or ms
+                print(f"  n={size:<6} {shape:<10} {name:<22} {ms:9.3f} ms  x{baseline / ms:5.1f}  "
+                      f"{len(encode(content)):>9} B")
+
+    print("Тела запросов /predict/batch:")
+    for size in (int(s) for s in args.sizes.split(",")):
+        records = [{
+            "Temperature": round(rng.uniform(-40, 40), 1), "Wind_Speed": round(rng.uniform(0, 30), 1),
+            "Precipitation": 0.0, "Sex": rng.choice(["male", "female"]), "Age": rng.randint(18, 65),
+        } for _ in range(size)]
+        for name, (encode, decode) in DECODERS.items():
+            body = encode(records)
+            ms = median_ms(decode, body, args.repeats)
+            print(f"  n={size:<6} {name:<8} {ms:9.3f} ms  {len(body):>9} B")
+
+
+if __name__ == "__main__":
+    main()
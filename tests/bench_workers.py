@@ -0,0 +1,139 @@
+"""
+Масштабирование ww-api по числу воркеров uvicorn: пропускная способность и память.
+
+Для каждого значения --workers поднимает uvicorn с этим числом процессов
+(WW_BACKEND берётся из окружения, по умолчанию artifact), нагружает его
+уровнями параллелизма из --concurrency так же, как tests/bench_api.py, а затем
+опрашивает GET /stats/memory, пока не ответят все воркеры. Печатает таблицу
+rps, rps на воркер, RSS/PSS на воркер и сумму PSS; --out пишет отчёт в JSON.
+
+Примеры:
+    python tests/bench_workers.py --workers 1,2,4 --concurrency 64 --requests 5000
+    WW_BACKEND=keras python tests/bench_workers.py --workers 1,2 --out workers.json
+
+Требуется httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_api import API_DIR, parse_mix, run_level, wait_ready
+
+
+def start_server(workers, port, backend):
+    env = dict(os.environ, WW_BACKEND=backend, WEB_CONCURRENCY=str(workers))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=API_DIR,
+        env=env,
+    )
+
+
+async def collect_memory(client, workers, attempts):
+    """Опрашивает /stats/memory, пока не ответят все воркеры (запросы распределяет ядро)."""
+    by_pid = {}
+    for _ in range(attempts):
+        stats = (await client.get("/stats/memory")).json()
+        by_pid[stats["pid"]] = stats
+        if len(by_pid) == workers:
+            break
+    return list(by_pid.values())
+
+
+async def measure(url, workers, args):
+    mix = parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    # Соединения не переиспользуются, чтобы ядро раздавало их по всем воркерам
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, args.ready_timeout)
+        # /ready отвечает один воркер; прогрев даёт догрузиться остальным
+        await run_level(client, max(levels), args.warmup * workers, mix, args.seed - 1)
+        results = [
+            await run_level(client, concurrency, args.requests, mix, args.seed + i)
+            for i, concurrency in enumerate(levels)
+        ]
+        memory = await collect_memory(client, workers, attempts=workers * 50)
+    return results, memory
+
+
+def summarize_run(workers, levels, memory):
+    best = max(levels, key=lambda level: level["throughput_rps"])
+    pss = [stats.get("pss_kb", 0) for stats in memory]
+    rss = [stats.get("rss_kb", stats["max_rss_kb"]) for stats in memory]
+    return {
+        "workers": workers,
+        "levels": levels,
+        "memory": memory,
+        "workers_seen": len(memory),
+        "best_throughput_rps": best["throughput_rps"],
+        "rps_per_worker": best["throughput_rps"] / workers,
+        "rss_kb_per_worker": sum(rss) / len(rss) if rss else 0.0,
+        "pss_kb_per_worker": sum(pss) / len(pss) if pss else 0.0,
+        "pss_kb_total": sum(pss) / len(pss) * workers if pss else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Масштабирование ww-api по числу воркеров")
+    parser.add_argument("--workers", default="1,2,4", help="Числа воркеров через запятую")
+    parser.add_argument("--concurrency", default="64", help="Уровни параллелизма через запятую")
+    parser.add_argument("--requests", type=int, default=2000, help="Запросов на каждый уровень")
+    parser.add_argument("--mix", default="predict", help='Смесь нагрузок, например "predict=0.9,batch:64=0.1"')
+    parser.add_argument("--warmup", type=int, default=100, help="Запросов прогрева на воркер")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--ready-timeout", type=float, default=180.0)
+    parser.add_argument("--out", help="Куда записать результаты в JSON")
+    args = parser.parse_args()
+
+    backend = os.getenv("WW_BACKEND", "artifact")
+    url = f"http://127.0.0.1:{args.port}"
+    runs = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        server = start_server(workers, args.port, backend)
+        try:
+            levels, memory = asyncio.run(measure(url, workers, args))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        runs.append(summarize_run(workers, levels, memory))
+        # Порт освобождается не мгновенно
+        time.sleep(1.0)
+
+    base = runs[0]["best_throughput_rps"] / runs[0]["workers"] if runs else 0.0
+    print(f"{'workers':>7} {'rps':>9} {'rps/worker':>11} {'scaling':>8} {'RSS/worker, MB':>15} "
+          f"{'PSS/worker, MB':>15} {'PSS total, MB':>14}")
+    for run in runs:
+        scaling = run["rps_per_worker"] / base if base else 0.0
+        print(f"{run['workers']:>7} {run['best_throughput_rps']:9.1f} {run['rps_per_worker']:11.1f} {scaling:8.2f} "
+              f"{run['rss_kb_per_worker'] / 1024:15.1f} {run['pss_kb_per_worker'] / 1024:15.1f} "
+              f"{run['pss_kb_total'] / 1024:14.1f}")
+        if run["workers_seen"] < run["workers"]:
+            print(f"  ответили /stats/memory только {run['workers_seen']} из {run['workers']} воркеров")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "backend": backend,
+                "mix": args.mix,
+                "python": platform.python_version(),
+                "cpu_count": os.cpu_count(),
+                "runs": runs,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Воспроизведение журнала запросов, записанного ww-api (WW_CAPTURE_PATH).
+
+Записи отправляются в порядке времени с исходными интервалами, делёнными на
+--speed (--speed 0 - без пауз, так быстро, как позволяет --concurrency).
+Цели:
+    --url http://127.0.0.1:800   POST /predict на запущенный сервер
+    --direct                     прямо в предсказатель ww-api (app.main.infer_rows) без HTTP
+
+По итогам печатаются пропускная способность, задержки p50/p95/p99 и отставание
+от расписания; --out сохраняет отчёт в JSON в формате tests/bench_api.py.
+
+Примеры:
+    python tests/replay_capture.py capture.wwc --url http://127.0.0.1:800 --speed 10
+    WW_BACKEND=artifact python tests/replay_capture.py capture.*.wwc --direct --speed 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ww-api")
+sys.path.insert(0, API_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.capture import read_capture, to_rows
+from bench_api import summarize
+
+SEX_NAMES = ("male", "female")
+
+
+def load_records(paths, limit=None):
+    """Сливает журналы (например, по одному на воркер) в один, упорядоченный по времени."""
+    records = np.concatenate([read_capture(path) for path in paths])
+    records = np.sort(records, order="time", kind="stable")
+    return records[:limit] if limit else records
+
+
+def schedule(records, speed):
+    """Смещения отправки от начала воспроизведения в секундах."""
+    if speed <= 0 or not len(records):
+        return np.zeros(len(records))
+    return (records["time"] - records["time"][0]) / speed
+
+
+def payload(row):
+    return {
+        "Temperature": float(row[0]),
+        "Wind_Speed": float(row[1]),
+        "Precipitation": float(row[2]),
+        "Sex": SEX_NAMES[int(row[3])],
+        "Age": int(row[4]),
+    }
+
+
+async def replay_http(url, rows, offsets, concurrency, timeout):
+    import httpx
+
+    latencies, lags = [], []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+        async def send(row, offset):
+            nonlocal errors
+            async with semaphore:
+                sent = time.perf_counter()
+                lags.append(max(0.0, sent - started - offset))
+                try:
+                    response = await client.post("/predict", json=payload(row))
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - sent)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        tasks = []
+        for row, offset in zip(rows, offsets):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(send(row, offset)))
+        await asyncio.gather(*tasks)
+    return latencies, errors, lags, time.perf_counter() - started
+
+
+def replay_direct(rows, offsets):
+    """По одной строке в предсказатель ww-api, как одиночные /predict без микробатчинга."""
+    os.chdir(API_DIR)
+    from app import main
+
+    main.activate(main.load_model())
+
+    latencies, lags = [], []
+    started = time.perf_counter()
+    for row, offset in zip(rows, offsets):
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        lags.append(max(0.0, sent - started - offset))
+        main.infer_rows(row[np.newaxis, :])
+        latencies.append(time.perf_counter() - sent)
+    return latencies, 0, lags, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение журнала запросов ww-api")
+    parser.add_argument("paths", nargs="+", help="Файлы журнала")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Адрес запущенного сервера")
+    target.add_argument("--direct", action="store_true", help="Вызывать предсказатель напрямую, без HTTP")
+    parser.add_argument("--speed", type=float, default=1.0, help="Ускорение относительно исходного темпа; 0 - без пауз")
+    parser.add_argument("--concurrency", type=int, default=64, help="Максимум запросов в полёте (только --url)")
+    parser.add_argument("--limit", type=int, default=None, help="Воспроизвести только первые N записей")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", help="Куда записать отчёт в JSON")
+    args = parser.parse_args()
+
+    out_path = os.path.abspath(args.out) if args.out else None
+    records = load_records(args.paths, args.limit)
+    rows = to_rows(records)
+    offsets = schedule(records, args.speed)
+    span = float(records["time"][-1] - records["time"][0]) if len(records) else 0.0
+    print(f"Записей: {len(records)}, исходная длительность {span:.1f} с, ускорение {args.speed or 'без пауз'}")
+
+    if args.direct:
+        latencies, errors, lags, elapsed = replay_direct(rows, offsets)
+    else:
+        latencies, errors, lags, elapsed = asyncio.run(
+            replay_http(args.url, rows, offsets, args.concurrency, args.timeout)
+        )
+
+    result = summarize(latencies, errors, len(latencies), elapsed, 1 if args.direct else args.concurrency)
+    lags_ms = np.asarray(lags) * 1000.0
+    result["schedule_lag_ms"] = {
+        "mean": float(lags_ms.mean()) if len(lags_ms) else 0.0,
+        "max": float(lags_ms.max()) if len(lags_ms) else 0.0,
+    }
+    latency = result["latency_ms"]
+    print(
+        f"rps={result['throughput_rps']:.1f} p50={latency['p50']:.2f}ms p95={latency['p95']:.2f}ms "
+        f"p99={latency['p99']:.2f}ms errors={errors} lag max={result['schedule_lag_ms']['max']:.1f}ms"
+    )
+
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump({
+                "target": args.url or "direct",
+                "backend": os.getenv("WW_BACKEND", "keras"),
+                "captures": args.paths,
+                "speed": args.speed,
+                "levels": [result],
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app import main
+
+
+def test_admin_disabled_without_token(monkeypatch):
+    """
+    Проверяет, что без WW_ADMIN_TOKEN эндпоинты /admin/* недоступны.
+    """
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    client = TestClient(main.app)
+
+    assert client.get("/admin/profile").status_code == 404
+    assert client.post("/admin/reload", headers={"Authorization": "Bearer anything"}).status_code == 404
+
+
+def test_admin_requires_bearer_token(monkeypatch):
+    """
+    Проверяет, что /admin/* отвечает только на верный токен в Authorization: Bearer.
+    """
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+
+    response = client.get("/admin/profile")
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert client.get("/admin/profile", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/admin/profile", headers={"Authorization": "Basic secret"}).status_code == 401
+
+    response = client.get("/admin/profile", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.json()["active"] is False
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.admission import AdmissionMiddleware
+from app.metrics import SHED, STAGE_SECONDS
+
+
+def make_app(release):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def call(middleware, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/predict", "headers": list(headers)}
+    await middleware(scope, receive, send)
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+def test_queue_full_and_deadline_are_shed():
+    """
+    Проверяет сброс при полной очереди и по дедлайну, а также передачу слота из очереди.
+    """
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(
+            make_app(release), ["/predict"], max_concurrency=1, max_queue=1, deadline_ms=5000
+        )
+        running = asyncio.ensure_future(call(middleware))
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(call(middleware))
+        await asyncio.sleep(0)
+
+        status, headers = await call(middleware)  # очередь из одного места уже занята
+        assert (status, headers[b"retry-after"]) == (503, b"1")
+
+        release.set()
+        assert (await running)[0] == 200
+        assert (await queued)[0] == 200
+
+        release.clear()
+        running = asyncio.ensure_future(call(middleware))
+        await asyncio.sleep(0)
+        status, _ = await call(middleware, [(b"x-deadline-ms", b"10")])
+        assert status == 503
+        release.set()
+        await running
+        return middleware
+
+    before_full = SHED._values.get(("/predict", "queue_full"), 0)
+    before_deadline = SHED._values.get(("/predict", "deadline"), 0)
+    middleware = asyncio.run(scenario())
+
+    assert SHED._values[("/predict", "queue_full")] == before_full + 1
+    assert SHED._values[("/predict", "deadline")] == before_deadline + 1
+    assert middleware._active == 0 and not middleware._waiters
+
+
+def test_slot_granted_at_timeout_is_released(monkeypatch):
+    """
+    Проверяет, что слот, переданный ожидающему одновременно с таймаутом, не теряется.
+    """
+    async def wait_for_then_timeout(future, timeout):
+        # Гонка из asyncio.timeout: ожидание завершилось, но wait_for всё равно сообщает о таймауте
+        await future
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(make_app(release), ["/predict"], max_concurrency=1, max_queue=1)
+        running = asyncio.ensure_future(call(middleware))
+        await asyncio.sleep(0)
+        monkeypatch.setattr(asyncio, "wait_for", wait_for_then_timeout)
+        queued = asyncio.ensure_future(call(middleware))
+        await asyncio.sleep(0)
+
+        release.set()
+        assert (await running)[0] == 200
+        assert (await queued)[0] == 503
+        return middleware
+
+    middleware = asyncio.run(scenario())
+    assert middleware._active == 0 and not middleware._waiters
+
+
+def test_queue_wait_is_recorded_for_handler():
+    """
+    Проверяет, что время ожидания слота кладётся в scope и в стадию queue.
+    """
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope.get("ww.queued"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    before = STAGE_SECONDS._series.get(("queue",), [None, 0.0, 0])[2]
+    asyncio.run(call(AdmissionMiddleware(app, ["/predict"])))
+
+    assert len(seen) == 1 and seen[0] is not None and seen[0] >= 0.0
+    assert STAGE_SECONDS._series[("queue",)][2] == before + 1
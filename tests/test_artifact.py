@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.artifact import load_artifact, write_artifact
+from app.engine import BODY_PARTS, TRUNK_LAYERS, NumpyBackend
+
+
+def test_artifact_roundtrip(tmp_path):
+    """
+    Проверяет, что артефакт читается без копирования и даёт те же предсказания, что исходные веса.
+    """
+    rng = np.random.default_rng(1)
+    sizes = dict(zip(BODY_PARTS, (8, 2, 2, 18, 11, 13)))
+    weights = {
+        TRUNK_LAYERS[0]: (rng.normal(size=(5, 128)), rng.normal(size=128)),
+        TRUNK_LAYERS[1]: (rng.normal(size=(128, 64)), rng.normal(size=64)),
+    }
+    weights.update({part: (rng.normal(size=(64, n)), rng.normal(size=n)) for part, n in sizes.items()})
+    classes = {part: [""] + [f"{part}-{i}" for i in range(1, n)] for part, n in sizes.items()}
+    mean, scale = rng.normal(size=5), rng.uniform(1, 10, size=5)
+
+    path = str(tmp_path / "model.wwm")
+    version = write_artifact(path, weights, mean, scale, classes)
+    artifact = load_artifact(path)
+
+    assert artifact.version == version
+    assert artifact.head_sizes == [sizes[part] for part in BODY_PARTS]
+    assert list(artifact.classes["neck"]) == classes["neck"]
+    assert not artifact.arrays["heads/kernel"].flags.writeable
+    np.testing.assert_allclose(artifact.arrays["trunk/1/kernel"], weights[TRUNK_LAYERS[1]][0], rtol=1e-6)
+
+    x = rng.normal(size=(32, 5)) * 10
+    expected = NumpyBackend.from_layers(
+        [weights[name] for name in TRUNK_LAYERS], [weights[part] for part in BODY_PARTS], mean=mean, scale=scale
+    )
+    engine = NumpyBackend.from_artifact(artifact)
+    assert engine.head_kernel.base is not None, "Веса голов не должны копироваться из mmap."
+    for a, b in zip(engine.forward(engine.scale(x)), expected.forward(expected.scale(x))):
+        np.testing.assert_array_equal(np.argmax(a, axis=1), np.argmax(b, axis=1))
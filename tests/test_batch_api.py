@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app import main
+
+OUTFIT = ("Шапка", "", "Шарф", "Куртка", "Джинсы", "Ботинки")
+VALID = {"Temperature": -5.0, "Wind_Speed": 3.0, "Precipitation": 0.0, "Sex": "male", "Age": 25}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Приложение без загрузки модели: predict_rows возвращает фиксированный комплект."""
+    monkeypatch.setattr(main, "ready", True)
+    monkeypatch.setattr(main, "served", main.ServedModel(None, {}, "test-version"))
+    monkeypatch.setattr(main, "capture", None)
+    monkeypatch.setattr(main, "predict_rows", lambda rows: ([OUTFIT] * len(rows), "test-version"))
+    # Без контекстного менеджера lifespan (загрузка модели и микробатчер) не запускается
+    return TestClient(main.app)
+
+
+def test_invalid_items_get_own_errors(client):
+    """
+    Проверяет, что невалидные элементы, в том числе не-объекты, не отклоняют весь батч.
+    """
+    records = [1, VALID, {**VALID, "Sex": "other"}, "text", None, VALID]
+    response = client.post("/predict/batch", json=records)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["model_version"] == "test-version"
+    results = body["results"]
+    assert len(results) == len(records)
+    for i in (0, 2, 3, 4):
+        assert "error" in results[i] and results[i]["error"], i
+    for i in (1, 5):
+        assert results[i]["recommendation"] == "Шапка, Шарф, Куртка, Джинсы, Ботинки"
+        assert results[i]["outfit"]["arms"] is None
+
+
+def test_too_many_records_are_rejected(client, monkeypatch):
+    """
+    Проверяет ответ 413 при превышении WW_BULK_MAX_RECORDS и приём батча на границе.
+    """
+    monkeypatch.setattr(main, "BULK_MAX_RECORDS", 2)
+
+    assert client.post("/predict/batch", json=[VALID] * 3).status_code == 413
+    assert client.post("/predict/batch", json=[VALID] * 2).status_code == 200
+
+
+def test_body_must_be_a_list(client):
+    """
+    Проверяет, что тело не-массив по-прежнему отклоняется целиком.
+    """
+    assert client.post("/predict/batch", json=VALID).status_code == 422
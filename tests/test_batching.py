@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.batching import MicroBatcher
+
+
+@pytest.fixture
+def batcher():
+    calls = []
+
+    def predict_fn(matrix):
+        calls.append(matrix.shape[0])
+        return [float(row.sum()) for row in matrix]
+
+    b = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=50)
+    b.calls = calls
+    b.start()
+    yield b
+    b.stop()
+
+
+def test_each_caller_gets_own_row(batcher):
+    """
+    Проверяет, что параллельные запросы склеиваются в батч и получают свои результаты.
+    """
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict([i, 0, 0, 0, 0])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: float(i) for i in range(16)}
+    assert max(batcher.calls) > 1, "Ожидается хотя бы один батч из нескольких строк."
+    assert all(size <= 8 for size in batcher.calls), "Размер батча не должен превышать max_batch_size."
+
+    stats = batcher.stats()
+    assert stats["rows"] == 16
+    assert stats["batches"] == len(batcher.calls)
+    assert sum(stats["batch_size_histogram"].values()) == stats["batches"]
+
+
+def test_error_is_propagated_to_every_caller():
+    """
+    Проверяет, что исключение в predict_fn возвращается всем запросам батча.
+    """
+    def predict_fn(matrix):
+        raise RuntimeError("boom")
+
+    b = MicroBatcher(predict_fn, max_batch_size=4, max_wait_ms=1)
+    b.start()
+    try:
+        with pytest.raises(RuntimeError):
+            b.predict(np.zeros(5))
+    finally:
+        b.stop()
+
+
+def test_cancelled_request_does_not_kill_worker():
+    """
+    Проверяет, что отменённый в очереди запрос пропускается, а поток батчера продолжает работу.
+    """
+    release = threading.Event()
+    calls = []
+
+    def predict_fn(matrix):
+        release.wait()
+        calls.append(matrix.shape[0])
+        return [float(row.sum()) for row in matrix]
+
+    b = MicroBatcher(predict_fn, max_batch_size=1, max_wait_ms=1)
+    b.start()
+    try:
+        blocking = b.submit([1, 0, 0, 0, 0])
+        cancelled = b.submit([2, 0, 0, 0, 0])
+        assert cancelled.cancel()
+        release.set()
+
+        assert blocking.result(timeout=5) == 1.0
+        assert b.predict([3, 0, 0, 0, 0]) == 3.0
+        assert b._thread.is_alive()
+        assert calls == [1, 1], "Отменённая строка не должна попадать в predict_fn."
+    finally:
+        b.stop()
+
+
+def test_result_count_mismatch_is_an_error():
+    """
+    Проверяет, что predict_fn с неверным числом результатов даёт ошибку, а не теряет запросы.
+    """
+    b = MicroBatcher(lambda matrix: [], max_batch_size=4, max_wait_ms=1)
+    b.start()
+    try:
+        with pytest.raises(RuntimeError):
+            b.submit(np.zeros(5)).result(timeout=5)
+    finally:
+        b.stop()
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.cache import QuantizedCache
+
+
+def test_close_inputs_share_key():
+    """
+    Проверяет, что близкие входы попадают в одну ячейку сетки.
+    """
+    cache = QuantizedCache(maxsize=8, steps=(0.5, 0.5, 0.1, 1, 1))
+    assert cache.key([10.1, 3.4, 0.0, 0, 25]) == cache.key([10.2, 3.6, 0.04, 0, 25])
+    assert cache.key([10.1, 3.4, 0.0, 0, 25]) != cache.key([10.1, 3.4, 0.0, 1, 25])
+    assert cache.snap([10.2, 3.6, 0.0, 1, 25]) == [10.0, 3.5, 0.0, 1.0, 25.0]
+
+
+def test_counters_and_lru_eviction():
+    """
+    Проверяет счётчики попаданий, промахов и вытеснений.
+    """
+    cache = QuantizedCache(maxsize=2)
+    a, b, c = (cache.key([t, 0, 0, 0, 30]) for t in (0, 10, 20))
+
+    assert cache.get(a) is None
+    cache.put(a, ["Шапка"])
+    cache.put(b, ["Кепка"])
+    assert cache.get(a) == ["Шапка"]
+    cache.put(c, ["Панама"])  # вытесняет b: к a обращались позже
+
+    assert cache.get(b) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 2, 1, 2)
+
+    cache.clear()
+    assert cache.stats()["size"] == 0
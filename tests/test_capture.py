@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.capture import HEADER, RECORD, CaptureMiddleware, RequestCapture, read_capture, to_rows
+from app.http_cache import ETagMiddleware, ResponseCache
+
+
+def test_capture_round_trip(tmp_path):
+    """
+    Проверяет запись журнала пачками и чтение обратно, включая оборванную последнюю запись.
+    """
+    path = str(tmp_path / "capture.wwc")
+    capture = RequestCapture(path, sample_rate=1.0, flush_records=2)
+    capture.record([10.5, 3.0, 0.0, 1, 30], received=200.0)
+    capture.record([-5.0, 7.5, 1.0, 0, 65], received=100.0)
+    capture.record([20.0, 1.0, 0.0, 0, 18], received=300.0)
+    capture.flush()
+    with open(path, "ab") as f:
+        f.write(b"\0" * (RECORD.size - 1))
+
+    records = read_capture(path)
+    assert records["time"].tolist() == [100.0, 200.0, 300.0]
+    np.testing.assert_allclose(to_rows(records)[0], [-5.0, 7.5, 1.0, 0, 65])
+    assert capture.stats()["captured"] == 3
+
+
+def test_sampling_and_size_limit(tmp_path):
+    """
+    Проверяет, что sample_rate=0 ничего не пишет, а max_bytes ограничивает размер журнала.
+    """
+    silent = RequestCapture(str(tmp_path / "silent.wwc"), sample_rate=0.0)
+    silent.record([0, 0, 0, 0, 0])
+    assert silent.stats()["captured"] == 0
+
+    path = str(tmp_path / "small.wwc")
+    capped = RequestCapture(path, sample_rate=1.0, max_bytes=HEADER.size + RECORD.size)
+    capped.record([0, 0, 0, 0, 0])
+    capped.record([1, 1, 1, 1, 1])
+    capped.flush()
+    assert capped.stats()["dropped"] == 1
+    assert len(read_capture(path)) == 1
+
+
+def test_middleware_captures_cached_and_not_modified(tmp_path):
+    """
+    Проверяет, что запросы, на которые ответили 304 или из кэша ответов, тоже попадают в журнал.
+    """
+    payload = {"Temperature": 10.5, "Wind_Speed": 3.0, "Precipitation": 0.0, "Sex": "female", "Age": 30}
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(json.loads((await receive())["body"]))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    capture = RequestCapture(str(tmp_path / "capture.wwc"), sample_rate=1.0)
+    etag = ETagMiddleware(app, ["/predict"], lambda: "v1", cache=ResponseCache(8))
+    middleware = CaptureMiddleware(etag, capture, ["/predict"], lambda body, content_type: json.loads(body))
+
+    def request(headers=()):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/predict", "headers": list(headers)}
+        asyncio.run(middleware(scope, receive, send))
+        return messages[0]["status"], dict(messages[0]["headers"])
+
+    status, headers = request()
+    assert status == 200
+    assert request()[0] == 200
+    assert request([(b"if-none-match", headers[b"etag"])])[0] == 304
+    assert calls == [payload]
+
+    capture.flush()
+    records = read_capture(capture.path)
+    assert len(records) == 3
+    np.testing.assert_allclose(to_rows(records)[0], [10.5, 3.0, 0.0, 1, 30])
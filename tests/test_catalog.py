@@ -0,0 +1,43 @@
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "NN"))
+from app.catalog import CatalogIndex, load_catalog
+from generator import load_clothing
+
+NN_CSV = os.path.join(os.path.dirname(__file__), "..", "NN", "file.csv")
+
+
+def test_index_matches_clothing_dict():
+    """
+    Проверяет, что скомпилированный индекс содержит те же вещи, что и load_clothing.
+    """
+    catalog = CatalogIndex.compile(NN_CSV)
+    clothing_dict = load_clothing(NN_CSV)
+
+    assert sorted(catalog.parts) == sorted(clothing_dict)
+    for part, by_category in clothing_dict.items():
+        for category, items in by_category.items():
+            assert sorted(catalog.items(part, category)) == sorted(items)
+
+
+def test_cache_is_rebuilt_when_csv_changes(tmp_path):
+    """
+    Проверяет, что кэш индекса используется повторно и пересобирается при изменении CSV.
+    """
+    csv_path = str(tmp_path / "file.csv")
+    shutil.copy(NN_CSV, csv_path)
+
+    first = load_catalog(csv_path)
+    cache_path = str(tmp_path / "file.catalog.npz")
+    assert os.path.exists(cache_path)
+    assert load_catalog(csv_path).source_sha256 == first.source_sha256
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("\nТестовая шапка,Унисекс,18-65,Голова,1, 2\n")
+    rebuilt = load_catalog(csv_path)
+
+    assert rebuilt.source_sha256 != first.source_sha256
+    assert "Тестовая шапка" in rebuilt.items("Голова", 1)
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.forecast import group_runs, plan
+
+STEPS = (0.5, 0.5, 0.1, 1, 1)
+
+
+def test_plan_scores_each_quantized_row_once():
+    """
+    Проверяет, что часы с одинаковыми квантованными входами сводятся к одной строке.
+    """
+    rows = [
+        [10.1, 3.4, 0.0, 0, 25],
+        [10.2, 3.6, 0.0, 0, 25],   # та же ячейка, что и предыдущий час
+        [15.0, 3.5, 0.0, 0, 25],
+        [10.0, 3.5, 0.0, 0, 25],   # не соседний, но совпадает с первым
+    ]
+    unique_rows, index = plan(rows, STEPS)
+
+    assert index == [0, 0, 1, 0]
+    assert unique_rows == [[10.0, 3.5, 0.0, 0.0, 25.0], [15.0, 3.5, 0.0, 0.0, 25.0]]
+
+
+def test_group_runs_merges_consecutive_equal_outfits():
+    """
+    Проверяет склейку подряд идущих часов с одинаковым комплектом.
+    """
+    cap, hat = ["Кепка", "Куртка"], ["Шапка", "Пуховик"]
+    segments = group_runs([cap, cap, hat, cap], times=["00:00", "01:00", "02:00", "03:00"])
+
+    assert [(s["first"], s["last"], s["hours"]) for s in segments] == [(0, 1, 2), (2, 2, 1), (3, 3, 1)]
+    assert segments[0]["recommendation"] == "Кепка, Куртка"
+    assert (segments[0]["start"], segments[0]["end"]) == ("00:00", "01:00")
+    assert "start" not in group_runs([cap])[0]
@@ -0,0 +1,54 @@
+import csv
+import os
+import shutil
+import sys
+
+import numpy as np
+
+NN_DIR = os.path.join(os.path.dirname(__file__), "..", "NN")
+sys.path.insert(0, NN_DIR)
+from generator import OUTPUT_HEADERS, REQUIRED_PARTS, generate_chunk, get_weather_category, load_clothing, main
+from app.catalog import load_catalog, weather_category
+
+
+def test_vectorized_categories_match_scalar():
+    """
+    Проверяет, что векторная категоризация совпадает с get_weather_category, включая границы интервалов.
+    """
+    temperatures = np.concatenate([np.arange(-45, 46, 0.5), [-40, -35, -30, -20, 0, 2, 40, -40.01]])
+    for precipitation in (0, 1):
+        vectorized = weather_category(temperatures, np.full(len(temperatures), precipitation))
+        expected = [get_weather_category(t, bool(precipitation)) for t in temperatures]
+        assert vectorized.tolist() == expected
+
+
+def test_generated_rows_use_catalog_items(tmp_path):
+    """
+    Проверяет, что сгенерированные строки берут одежду из каталога нужной категории.
+    """
+    csv_path = os.path.join(NN_DIR, "file.csv")
+    clothing_dict = load_clothing(csv_path)
+    # Кэш индекса - во временном каталоге, а не рядом с NN/file.csv
+    catalog = load_catalog(csv_path, str(tmp_path / "file.catalog.npz"))
+    chunk = generate_chunk(np.random.default_rng(0), catalog, 2000)
+
+    assert list(chunk) == OUTPUT_HEADERS
+    assert len(chunk["Temperature"]) > 0
+    for i in range(len(chunk["Temperature"])):
+        category = int(chunk["Category"][i])
+        for part, column in zip(REQUIRED_PARTS, ["Head_Clothing", "Body_Clothing", "Legs_Clothing", "Shoes_Clothing"]):
+            assert chunk[column][i] in clothing_dict[part][category]
+
+
+def test_legacy_main_writes_res_csv(tmp_path, monkeypatch):
+    """
+    Проверяет обычный режим генератора (без --fast): res.csv с заголовком и строками из каталога.
+    """
+    shutil.copy(os.path.join(NN_DIR, "file.csv"), tmp_path / "file.csv")
+    monkeypatch.chdir(tmp_path)
+    main()
+
+    with open(tmp_path / "res.csv", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:6] == ["Temperature", "Wind_Speed", "Precipitation", "Category", "Sex", "Age"]
+    assert len(rows) > 100
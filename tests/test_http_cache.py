@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.http_cache import PARSED_BODY, ETagMiddleware, ResponseCache, etag_matches, normalize
+
+PAYLOAD = {"Temperature": 10.1, "Wind_Speed": 3.4, "Precipitation": 0.0, "Sex": "male", "Age": 25}
+
+
+def make_app():
+    calls = []
+
+    async def app(scope, receive, send):
+        message = await receive()
+        calls.append(json.loads(message["body"]))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app, calls
+
+
+def request(middleware, payload, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/predict", "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    start = messages[0]
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_normalize_rejects_nonstandard_bodies():
+    """
+    Проверяет, что кэшируются только тела стандартного вида.
+    """
+    assert normalize(PAYLOAD) == (10.1, 3.4, 0.0, 0, 25)
+    assert normalize(dict(PAYLOAD, Temperature=10.2), (0.5, 0.5, 0.1, 1, 1)) == normalize(PAYLOAD, (0.5, 0.5, 0.1, 1, 1))
+    assert normalize(dict(PAYLOAD, Sex="other")) is None
+    assert normalize(dict(PAYLOAD, Age="25")) is None
+    assert normalize({"Temperature": 1}) is None
+    assert etag_matches('W/"abc", "def"', '"abc"') and not etag_matches('"abc"', '"def"')
+
+
+def test_etag_304_and_shared_cache():
+    """
+    Проверяет ETag, ответ 304 на совпадающий If-None-Match и обслуживание повторов из кэша.
+    """
+    app, calls = make_app()
+    version = ["v1"]
+    middleware = ETagMiddleware(app, ["/predict"], lambda: version[0], max_age=60, cache=ResponseCache(8))
+
+    status, headers, body = request(middleware, PAYLOAD)
+    assert status == 200 and body == b"{}"
+    assert headers[b"cache-control"] == b"private, max-age=60"
+    etag = headers[b"etag"]
+
+    status, headers, body = request(middleware, PAYLOAD)
+    assert (status, headers[b"etag"], body) == (200, etag, b"{}")
+    assert len(calls) == 1
+
+    status, headers, body = request(middleware, PAYLOAD, [(b"if-none-match", etag)])
+    assert (status, body) == (304, b"")
+    assert headers[b"x-model-version"] == b"v1"
+    assert len(calls) == 1
+
+    version[0] = "v2"
+    status, headers, _ = request(middleware, PAYLOAD, [(b"if-none-match", etag)])
+    assert status == 200 and headers[b"etag"] != etag
+    assert len(calls) == 2
+
+
+def test_not_ready_passes_through_without_etag():
+    """
+    Проверяет, что до готовности модели ответы не получают ETag.
+    """
+    app, calls = make_app()
+    middleware = ETagMiddleware(app, ["/predict"], lambda: None)
+    status, headers, _ = request(middleware, PAYLOAD)
+    assert status == 200 and b"etag" not in headers
+    assert calls == [PAYLOAD]
+
+
+def test_accept_is_part_of_etag():
+    """
+    Проверяет, что JSON- и msgpack-ответы на один вход не делят ETag и запись кэша.
+    """
+    app, calls = make_app()
+    middleware = ETagMiddleware(
+        app, ["/predict"], lambda: "v1", cache=ResponseCache(8),
+        variant=lambda accept: "msgpack" if accept and "msgpack" in accept else "json",
+    )
+    _, json_headers, _ = request(middleware, PAYLOAD)
+    _, msgpack_headers, _ = request(middleware, PAYLOAD, [(b"accept", b"application/msgpack")])
+
+    assert json_headers[b"etag"] != msgpack_headers[b"etag"]
+    assert json_headers[b"vary"] == b"Accept"
+    assert len(calls) == 2
+
+
+def test_parsed_body_is_passed_to_app():
+    """
+    Проверяет, что разобранное тело передаётся приложению через scope["state"].
+    """
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scope.get("state", {}).get(PARSED_BODY))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = ETagMiddleware(app, ["/predict"], lambda: "v1")
+    request(middleware, PAYLOAD)
+    request(middleware, [1, 2])
+
+    assert seen == [PAYLOAD, [1, 2]]
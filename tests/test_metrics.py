@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.metrics import Counter, Histogram, render
+
+
+def test_histogram_exposition():
+    """
+    Проверяет кумулятивные корзины, сумму и счётчик гистограммы в формате Prometheus.
+    """
+    hist = Histogram("test_stage_seconds", "Test.", ("stage",), buckets=(0.001, 0.01))
+    hist.observe(0.0005, "scale")
+    hist.observe(0.005, "scale")
+    hist.observe(1.0, "scale")
+
+    text = render()
+    assert '# TYPE test_stage_seconds histogram' in text
+    assert 'test_stage_seconds_bucket{stage="scale",le="0.001"} 1' in text
+    assert 'test_stage_seconds_bucket{stage="scale",le="0.01"} 2' in text
+    assert 'test_stage_seconds_bucket{stage="scale",le="+Inf"} 3' in text
+    assert 'test_stage_seconds_count{stage="scale"} 3' in text
+
+
+def test_counter_labels():
+    """
+    Проверяет счётчик с метками.
+    """
+    counter = Counter("test_requests_total", "Test.", ("route", "status"))
+    counter.inc("/predict", "200")
+    counter.inc("/predict", "200")
+    counter.inc("/predict", "503")
+
+    text = render()
+    assert 'test_requests_total{route="/predict",status="200"} 2' in text
+    assert 'test_requests_total{route="/predict",status="503"} 1' in text
@@ -0,0 +1,54 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+API_DIR = os.path.join(os.path.dirname(__file__), "..", "ww-api")
+sys.path.insert(0, API_DIR)
+from app.engine import BODY_PARTS, NumpyBackend
+
+
+def test_scaler_folding_matches_explicit_scaling():
+    """
+    Проверяет, что сложенный в первый слой StandardScaler эквивалентен явному масштабированию.
+    """
+    rng = np.random.default_rng(0)
+    mean, scale = rng.normal(size=5), rng.uniform(0.5, 3.0, size=5)
+    trunk = [(rng.normal(size=(5, 8)), rng.normal(size=8)), (rng.normal(size=(8, 4)), rng.normal(size=4))]
+    heads = [(rng.normal(size=(4, n)), rng.normal(size=n)) for n in (2, 3, 2, 5, 4, 3)]
+    x = rng.normal(size=(16, 5)) * 10
+
+    folded = NumpyBackend.from_layers(trunk, heads, mean=mean, scale=scale, dtype=np.float64)
+    plain = NumpyBackend.from_layers(trunk, heads, dtype=np.float64)
+
+    for a, b in zip(folded.forward(folded.scale(x)), plain.forward((x - mean) / scale)):
+        np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(a.sum(axis=1), 1.0)
+
+
+def test_argmax_matches_keras():
+    """
+    Проверяет, что NumPy-движок даёт тот же argmax, что и keras, на сетке входов.
+    """
+    pytest.importorskip("h5py")
+    keras_models = pytest.importorskip("tensorflow.keras.models")
+
+    model_path = os.path.join(API_DIR, "model", "model.h5")
+    with open(os.path.join(API_DIR, "model", "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+
+    temps, winds, precs, sexes, ages = np.meshgrid(
+        np.arange(-40, 41, 5), [0, 5, 15, 30], [0, 1], [0, 1], [18, 40, 65], indexing="ij"
+    )
+    x = np.stack([a.ravel() for a in (temps, winds, precs, sexes, ages)], axis=1).astype(float)
+
+    keras_pred = keras_models.load_model(model_path).predict(scaler.transform(x), verbose=0)
+    engine = NumpyBackend.from_h5(model_path, scaler)
+    numpy_pred = engine.forward(engine.scale(x))
+
+    assert len(numpy_pred) == len(BODY_PARTS)
+    for part, k, n in zip(BODY_PARTS, keras_pred, numpy_pred):
+        np.testing.assert_array_equal(np.argmax(k, axis=1), np.argmax(n, axis=1), err_msg=part)
+        np.testing.assert_allclose(k, n, atol=1e-4)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.profiling import Profiler, ProfilingMiddleware
+
+
+def busy_predict(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_profile_is_written_as_collapsed_stacks(tmp_path):
+    """
+    Проверяет, что профиль содержит стек занятого потока, но не стеки простаивающих.
+    """
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_predict, args=(stop,), name="worker")
+    idle = threading.Thread(target=threading.Event().wait, args=(1.0,), name="idle", daemon=True)
+    worker.start()
+    idle.start()
+
+    profiler = Profiler(str(tmp_path))
+    profiler.start(sample_rate=1.0, interval_ms=1.0)
+    time.sleep(0.1)
+    path = profiler.stop()
+    stop.set()
+    worker.join()
+
+    assert not profiler.active and profiler.status()["samples"] > 0
+    lines = open(path).read().splitlines()
+    stacks = {line.rsplit(" ", 1)[0]: int(line.rsplit(" ", 1)[1]) for line in lines}
+    assert any(stack.startswith("worker;") and "test_profiling.py:busy_predict" in stack for stack in stacks)
+    assert not any(stack.startswith("idle;") for stack in stacks)
+
+
+def test_window_expires_and_disabled_middleware_passes_through(tmp_path):
+    """
+    Проверяет остановку по окну и то, что выключенный профилировщик не считает запросы.
+    """
+    profiler = Profiler(str(tmp_path))
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(profiler._sampled_requests)
+
+    middleware = ProfilingMiddleware(app, profiler, ["/predict"])
+    scope = {"type": "http", "path": "/predict"}
+    asyncio.run(middleware(scope, None, None))
+
+    profiler.start(seconds=0.02, sample_rate=1.0, interval_ms=1.0)
+    asyncio.run(middleware(scope, None, None))
+    deadline = time.monotonic() + 2.0
+    while profiler.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert seen == [0, 1] and profiler._sampled_requests == 0
+    assert not profiler.active and os.path.exists(profiler.last_profile)
+
+
+def test_request_from_previous_session_does_not_skew_counter(tmp_path):
+    """
+    Проверяет, что запрос, начатый в прошлой сессии, не уводит счётчик в минус после перезапуска.
+    """
+    profiler = Profiler(str(tmp_path))
+    profiler.start(sample_rate=0.5, interval_ms=50.0)
+    profiler.sample_rate = 1.0
+    old = profiler.request_started()
+    profiler.stop()
+
+    profiler.start(sample_rate=0.5, interval_ms=50.0)
+    profiler.request_finished(old)
+    assert profiler._sampled_requests == 0
+
+    profiler.sample_rate = 1.0
+    current = profiler.request_started()
+    assert profiler._sampled_requests == 1
+    profiler.request_finished(current)
+    assert profiler._sampled_requests == 0
+    profiler.stop()
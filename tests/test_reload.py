@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "ww-api"))
+from app.reload import FileWatcher
+
+
+def test_watcher_fires_once_after_file_settles(tmp_path):
+    """
+    Проверяет, что замена файла модели вызывает перезагрузку один раз и только после стабилизации.
+    """
+    path = tmp_path / "model.wwm"
+    path.write_bytes(b"v1")
+    fired = threading.Event()
+    calls = []
+
+    def callback():
+        calls.append(path.read_bytes())
+        fired.set()
+
+    watcher = FileWatcher([str(path)], callback, interval=0.02)
+    watcher.start()
+    try:
+        tmp = tmp_path / "model.wwm.tmp"
+        tmp.write_bytes(b"version-2")
+        os.replace(tmp, path)
+        assert fired.wait(2.0)
+    finally:
+        watcher.stop()
+
+    assert calls == [b"version-2"]
+
+
+@pytest.fixture
+def main(monkeypatch):
+    """app.main без настоящей модели: load_model отдаёт версии из списка versions."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("numpy")
+    from app import main
+
+    monkeypatch.setattr(main, "served", None)
+    monkeypatch.setattr(main, "ready", False)
+    monkeypatch.setattr(main, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(main, "cache", None)
+    monkeypatch.setattr(main, "response_cache", None)
+    monkeypatch.setattr(main, "load_clothing_catalog", lambda: None)
+    return main
+
+
+def fake_model(main, version):
+    return main.ServedModel(SimpleNamespace(name="fake"), {}, version)
+
+
+def test_reload_swaps_only_new_version(main, monkeypatch):
+    """
+    Проверяет, что reload_model подменяет модель новой версии и не трогает ту же версию.
+    """
+    main.activate(fake_model(main, "v1"))
+    current = main.served
+
+    monkeypatch.setattr(main, "load_model", lambda: fake_model(main, "v1"))
+    assert main.reload_model() == (current, False)
+    assert main.served is current
+
+    monkeypatch.setattr(main, "load_model", lambda: fake_model(main, "v2"))
+    model, swapped = main.reload_model()
+    assert swapped
+    assert main.served is model and model.version == "v2"
+
+
+def test_startup_does_not_override_reloaded_model(main, monkeypatch):
+    """
+    Проверяет, что перезагрузка во время медленного старта не теряется: в итоге обслуживается новая версия.
+    """
+    loading = threading.Event()
+    release = threading.Event()
+    versions = iter(["v1", "v2"])
+
+    def load_model():
+        version = next(versions)
+        if version == "v1":
+            loading.set()
+            release.wait(2.0)
+        return fake_model(main, version)
+
+    monkeypatch.setattr(main, "load_model", load_model)
+    starting = threading.Thread(target=main.startup)
+    starting.start()
+    assert loading.wait(2.0)
+    reloading = threading.Thread(target=main.reload_model)
+    reloading.start()
+    release.set()
+    starting.join(2.0)
+    reloading.join(2.0)
+
+    assert main.ready
+    assert main.served.version == "v2"
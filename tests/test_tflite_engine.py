@@ -0,0 +1,67 @@
+import os
+import pickle
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+API_DIR = os.path.join(os.path.dirname(__file__), "..", "ww-api")
+sys.path.insert(0, API_DIR)
+from app.engine import BODY_PARTS, TFLiteBackend, order_outputs
+
+
+def test_outputs_are_ordered_by_part_name_or_keras3_index():
+    """
+    Проверяет порядок выходов для сигнатур с именами частей тела и с output_N из Keras 3.
+    """
+    named = {part: {"index": i} for i, part in reversed(list(enumerate(BODY_PARTS)))}
+    assert [d["index"] for d in order_outputs(named)] == list(range(len(BODY_PARTS)))
+
+    numbered = {f"output_{i}": {"index": 10 + i} for i in (5, 0, 3, 1, 4, 2)}
+    assert [d["index"] for d in order_outputs(numbered)] == [10, 11, 12, 13, 14, 15]
+
+    with pytest.raises(ValueError):
+        order_outputs({"logits": {"index": 0}})
+
+
+def test_tflite_matches_keras_across_batch_sizes_and_threads(tmp_path):
+    """
+    Проверяет, что TFLite-движок совпадает с keras при разных размерах батча и в нескольких потоках.
+    """
+    tf = pytest.importorskip("tensorflow")
+
+    model = tf.keras.models.load_model(os.path.join(API_DIR, "model", "model.h5"))
+    with open(os.path.join(API_DIR, "model", "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+    model_path = tmp_path / "model.tflite"
+    model_path.write_bytes(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+
+    rng = np.random.default_rng(0)
+    x = np.column_stack([
+        rng.uniform(-40, 40, 64), rng.uniform(0, 30, 64), rng.integers(0, 2, 64),
+        rng.integers(0, 2, 64), rng.integers(18, 70, 64),
+    ]).astype(float)
+    keras_pred = model.predict(scaler.transform(x), verbose=0)
+    engine = TFLiteBackend(str(model_path), scaler)
+
+    errors = []
+
+    def check(sizes):
+        try:
+            for size in sizes:
+                predictions = engine.forward(engine.scale(x[:size]))
+                assert len(predictions) == len(BODY_PARTS)
+                for part, k, t in zip(BODY_PARTS, keras_pred, predictions):
+                    np.testing.assert_allclose(t, k[:size], atol=1e-4, err_msg=part)
+        except BaseException as e:
+            errors.append(e)
+
+    # Второй поток сначала растит буфер до 64, затем гоняет через него меньшие батчи
+    threads = [threading.Thread(target=check, args=(sizes,)) for sizes in ([1, 3, 32, 1], [64, 5, 5, 2])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,125 @@
+"""
+Контроль допуска к инференсу: ограниченная очередь и сброс нагрузки.
+
+Одновременно обрабатывается не больше max_concurrency запросов, ещё не
+больше max_queue ждут своей очереди. Если очередь полна или запрос не
+дождался слота до своего дедлайна, он сразу получает 503 с Retry-After,
+а не висит, пока клиент не отвалится по таймауту.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, QUEUE_SECONDS, SHED, STAGE_SECONDS
+
+
+class AdmissionMiddleware:
+    """
+    Чистый ASGI-middleware для маршрутов инференса.
+
+    Args:
+        app: Внутреннее ASGI-приложение.
+        paths: Маршруты, к которым применяется допуск.
+        max_concurrency (int): Сколько запросов обслуживается одновременно.
+        max_queue (int): Сколько запросов может ждать слота.
+        deadline_ms (float): Сколько запрос может ждать слота; клиент может
+            сократить его заголовком X-Deadline-Ms.
+        retry_after (int): Значение Retry-After в ответе 503, секунды.
+    """
+
+    def __init__(self, app, paths, max_concurrency=64, max_queue=256, deadline_ms=1000.0, retry_after=1):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline_ms / 1000.0
+        self.retry_after = str(retry_after).encode()
+        self._active = 0
+        self._waiters = deque()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = scope["path"]
+        started = time.perf_counter()
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+        else:
+            if len(self._waiters) >= self.max_queue:
+                await self._shed(send, route, "queue_full")
+                return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+            try:
+                # Слот передаётся из _release напрямую ожидающему, _active при этом не меняется
+                await asyncio.wait_for(waiter, self._deadline(scope))
+            except asyncio.TimeoutError:
+                self._discard(waiter)
+                # Слот мог прийти в той же итерации цикла, что и таймаут: возвращаем его
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                await self._shed(send, route, "deadline")
+                return
+            except BaseException:
+                self._discard(waiter)
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+
+        waited = time.perf_counter() - started
+        QUEUE_SECONDS.observe(waited, route)
+        STAGE_SECONDS.observe(waited, "queue")
+        # Обработчик вычитает ожидание из parse_validate (см. main.observe_parse_validate)
+        scope["ww.queued"] = waited
+        ADMISSION_IN_FLIGHT.set(self._active)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    def _deadline(self, scope):
+        for key, value in scope["headers"]:
+            if key == b"x-deadline-ms":
+                try:
+                    return max(0.0, min(self.deadline, float(value) / 1000.0))
+                except ValueError:
+                    break
+        return self.deadline
+
+    def _discard(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+                return
+        ADMISSION_QUEUE_DEPTH.set(0)
+        self._active -= 1
+        ADMISSION_IN_FLIGHT.set(self._active)
+
+    async def _shed(self, send, route, reason):
+        SHED.inc(route, reason)
+        body = json.dumps({"detail": "Server is overloaded, retry later", "reason": reason}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", self.retry_after),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
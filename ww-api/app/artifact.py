@@ -0,0 +1,179 @@
+"""
+Единый артефакт модели вместо model.h5 + scaler.pkl + label_encoders.pkl.
+
+Формат файла (.wwm):
+    8 байт   MAGIC
+    4 байта  версия формата (uint32, little-endian)
+    4 байта  длина заголовка (uint32, little-endian)
+    заголовок JSON: версия модели, таблицы классов, смещения и формы массивов
+    массивы float32 подряд, каждый выровнен на ALIGN байт
+
+Массивы уже разложены так, как их использует NumpyBackend (все головы в
+одной матрице), поэтому загрузчик отдаёт np.frombuffer поверх mmap без
+копирования. Несколько процессов, открывших один файл, делят страницы
+через page cache. Загрузка не требует sklearn, h5py и TensorFlow.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .engine import BODY_PARTS, TRUNK_LAYERS
+
+MAGIC = b'WWMODEL\0'
+FORMAT_VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct('<8sII')
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def file_version(path):
+    """Короткий sha256 файла - версия для артефактов старого формата (.h5)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def write_artifact(path, weights, mean, scale, classes, version=None):
+    """
+    Записывает артефакт модели.
+
+    Args:
+        path (str): Куда писать; файл заменяется атомарно.
+        weights (dict): Имя слоя -> (kernel, bias) для TRUNK_LAYERS и BODY_PARTS.
+        mean, scale: Параметры StandardScaler.
+        classes (dict): Часть тела -> список названий одежды (LabelEncoder.classes_).
+        version (str): Версия модели; по умолчанию sha256 от содержимого.
+
+    Returns:
+        str: Версия записанной модели.
+    """
+    arrays = {}
+    for i, name in enumerate(TRUNK_LAYERS):
+        kernel, bias = weights[name]
+        arrays[f'trunk/{i}/kernel'] = kernel
+        arrays[f'trunk/{i}/bias'] = bias
+    arrays['heads/kernel'] = np.concatenate([weights[part][0] for part in BODY_PARTS], axis=1)
+    arrays['heads/bias'] = np.concatenate([weights[part][1] for part in BODY_PARTS])
+    arrays['scaler/mean'] = mean
+    arrays['scaler/scale'] = scale
+    arrays = {name: np.ascontiguousarray(value, dtype='<f4') for name, value in arrays.items()}
+
+    classes = {part: [str(c) for c in classes[part]] for part in BODY_PARTS}
+    if version is None:
+        digest = hashlib.sha256(json.dumps(classes, ensure_ascii=False).encode('utf-8'))
+        for name in sorted(arrays):
+            digest.update(name.encode())
+            digest.update(arrays[name].tobytes())
+        version = digest.hexdigest()[:12]
+
+    layout = {}
+    offset = 0
+    for name, value in arrays.items():
+        layout[name] = {'offset': offset, 'shape': list(value.shape)}
+        offset = _align(offset + value.nbytes)
+
+    header = json.dumps({
+        'version': version,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'dtype': '<f4',
+        'body_parts': list(BODY_PARTS),
+        'head_sizes': [len(classes[part]) for part in BODY_PARTS],
+        'classes': classes,
+        'arrays': layout,
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for name, value in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(value.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return version
+
+
+class ModelArtifact:
+    """Открытый только для чтения артефакт; массивы - представления поверх mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, header_len = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a model artifact")
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported artifact format {format_version}")
+
+        header = json.loads(bytes(self._mmap[_PREFIX.size:_PREFIX.size + header_len]).decode('utf-8'))
+        data_start = _align(_PREFIX.size + header_len)
+        dtype = np.dtype(header['dtype'])
+
+        self.version = header['version']
+        self.created = header['created']
+        self.head_sizes = header['head_sizes']
+        self.classes = {part: np.asarray(header['classes'][part]) for part in header['body_parts']}
+        self.arrays = {}
+        for name, spec in header['arrays'].items():
+            count = int(np.prod(spec['shape']))
+            self.arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=data_start + spec['offset']
+            ).reshape(spec['shape'])
+
+    @property
+    def trunk(self):
+        return [
+            (self.arrays[f'trunk/{i}/kernel'], self.arrays[f'trunk/{i}/bias'])
+            for i in range(len(TRUNK_LAYERS))
+        ]
+
+
+def load_artifact(path):
+    return ModelArtifact(path)
+
+
+def export_from_legacy(model_path, scaler_path, encoders_path, output_path):
+    """Собирает артефакт из существующих model.h5, scaler.pkl и label_encoders.pkl."""
+    import pickle
+
+    from .engine import read_h5_weights
+
+    with open(scaler_path, 'rb') as f:
+        scaler = pickle.load(f)
+    with open(encoders_path, 'rb') as f:
+        le_dict = pickle.load(f)
+
+    return write_artifact(
+        output_path,
+        read_h5_weights(model_path),
+        scaler.mean_,
+        scaler.scale_,
+        {part: le_dict[part].classes_ for part in BODY_PARTS},
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Экспорт model.h5 + scaler.pkl + label_encoders.pkl в единый артефакт')
+    parser.add_argument('--model', default='model/model.h5')
+    parser.add_argument('--scaler', default='model/scaler.pkl')
+    parser.add_argument('--encoders', default='model/label_encoders.pkl')
+    parser.add_argument('-o', '--output', default='model/model.wwm')
+    args = parser.parse_args()
+
+    version = export_from_legacy(args.model, args.scaler, args.encoders, args.output)
+    print(f"Артефакт '{args.output}' записан, версия {version}")
@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _Item:
+    __slots__ = ("row", "future")
+
+    def __init__(self, row):
+        self.row = row
+        self.future = Future()
+
+
+class MicroBatcher:
+    """
+    Собирает одиночные строки признаков от параллельных запросов в одну матрицу.
+
+    Фоновый поток ждёт первую строку, затем добирает очередь в течение
+    max_wait_ms или до max_batch_size строк и один раз вызывает predict_fn.
+    predict_fn получает матрицу N x F и должна вернуть последовательность
+    из N результатов в том же порядке; каждый вызывающий получает свой.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self._predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._rows = 0
+        self._max_queue_depth = 0
+        self._size_histogram = {}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, row):
+        """Ставит строку в очередь и возвращает Future с результатом для неё."""
+        item = _Item(np.asarray(row, dtype=float))
+        self._queue.put(item)
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+        return item.future
+
+    def predict(self, row):
+        """Блокирующий вариант submit()."""
+        return self.submit(row).result()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Сигнал остановки: дообрабатываем текущий батч и выходим
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            # Запросы, отменённые в очереди (клиент отключился), не считаем; остальные
+            # переводятся в RUNNING и больше не могут быть отменены до set_result
+            batch = [item for item in self._collect(first) if item.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self._predict_fn(np.vstack([item.row for item in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"predict_fn returned {len(results)} results for {len(batch)} rows")
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+            else:
+                for item, result in zip(batch, results):
+                    item.future.set_result(result)
+
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch)
+                self._size_histogram[len(batch)] = self._size_histogram.get(len(batch), 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self._batches,
+                "rows": self._rows,
+                "avg_batch_size": self._rows / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+            }
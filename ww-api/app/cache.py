@@ -0,0 +1,79 @@
+import math
+import threading
+from collections import OrderedDict
+
+
+def quantize(row, steps):
+    """Номера ячеек сетки steps для строки [Temperature, Wind_Speed, Precipitation, Sex, Age]."""
+    return tuple(math.floor(value / step + 0.5) for value, step in zip(row, steps))
+
+
+def snap(row, steps):
+    """Центр ячейки сетки steps, в которую попадает строка."""
+    return [index * step for index, step in zip(quantize(row, steps), steps)]
+
+
+class QuantizedCache:
+    """
+    Ограниченный LRU-кэш рекомендаций с ключом по квантованным входам.
+
+    Непрерывные признаки округляются до сетки steps, поэтому 10.1 °C и
+    10.2 °C при шаге 0.5 дают один ключ. Модель при промахе считается на
+    квантованной строке (snap), так что ответ для ключа не зависит от того,
+    какой из близких входов пришёл первым.
+    """
+
+    def __init__(self, maxsize=65536, steps=(0.5, 0.5, 0.1, 1, 1)):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.steps = tuple(float(s) for s in steps)
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, row):
+        """Номера ячеек сетки для строки [Temperature, Wind_Speed, Precipitation, Sex, Age]."""
+        return quantize(row, self.steps)
+
+    def snap(self, row):
+        """Центр ячейки сетки, в которую попадает строка."""
+        return snap(row, self.steps)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "steps": list(self.steps),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,184 @@
+"""
+Выборочная запись входов /predict в компактный бинарный журнал для воспроизведения нагрузки.
+
+Формат файла: заголовок MAGIC + версия (uint16), затем записи RECORD
+фиксированной длины 23 байта (little-endian):
+
+    float64  время получения запроса, Unix-секунды
+    float32  Temperature
+    float32  Wind_Speed
+    float32  Precipitation
+    uint8    Sex (0 - male, 1 - female)
+    uint16   Age
+
+Записи копятся в памяти и дописываются в файл пачками, поэтому запрос
+платит только за random() и struct.pack_into. Журнал читается обратно
+одним np.frombuffer (см. read_capture и tests/replay_capture.py).
+"""
+import os
+import random
+import struct
+import threading
+import time
+
+import numpy as np
+
+from .http_cache import PARSED_BODY, _header, _read_body, _replay, normalize
+
+MAGIC = b'WWCAP\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<6sH')
+RECORD = struct.Struct('<dfffBH')
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('Temperature', '<f4'),
+    ('Wind_Speed', '<f4'),
+    ('Precipitation', '<f4'),
+    ('Sex', 'u1'),
+    ('Age', '<u2'),
+])
+
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+
+class RequestCapture:
+    """
+    Args:
+        path (str): Файл журнала; дописывается, заголовок пишется в новый файл.
+        sample_rate (float): Доля записываемых запросов, от 0 до 1.
+        max_bytes (int): После этого размера файла запись прекращается.
+        flush_records (int): Сколько записей копить в памяти до записи на диск.
+    """
+
+    def __init__(self, path, sample_rate=0.01, max_bytes=256 << 20, flush_records=4096):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.flush_records = flush_records
+
+        self._buffer = bytearray(RECORD.size * flush_records)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._random = random.random
+        self.captured = 0
+        self.dropped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION))
+        self._size = os.path.getsize(path)
+
+    def record(self, row, received=None):
+        """Записывает строку [Temperature, Wind_Speed, Precipitation, Sex, Age] с вероятностью sample_rate."""
+        if self.sample():
+            self.write(row, received)
+
+    def sample(self):
+        """Попадает ли очередной запрос в выборку."""
+        return self._random() < self.sample_rate
+
+    def write(self, row, received=None):
+        """Записывает строку без выборки (решение уже принято через sample())."""
+        timestamp = time.time() if received is None else received
+        with self._lock:
+            if self._size + (self._count + 1) * RECORD.size > self.max_bytes:
+                self.dropped += 1
+                return
+            RECORD.pack_into(self._buffer, self._count * RECORD.size,
+                             timestamp, row[0], row[1], row[2], int(row[3]), min(int(row[4]), 0xFFFF))
+            self._count += 1
+            self.captured += 1
+            if self._count == self.flush_records:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._count:
+            return
+        data = bytes(self._buffer[:self._count * RECORD.size])
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self._size += len(data)
+        self._count = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "sample_rate": self.sample_rate,
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "bytes": self._size + self._count * RECORD.size,
+            }
+
+
+class CaptureMiddleware:
+    """
+    Чистый ASGI-middleware записи входов POST-маршрутов из paths (формат тела /predict).
+
+    Стоит снаружи ETagMiddleware, поэтому в журнал попадают и запросы,
+    на которые отвечают 304 или общий кэш ответов. Тело читается только у
+    запросов, попавших в выборку; разобранное тело кладётся в
+    scope["state"][PARSED_BODY], и дальше его второй раз не разбирают.
+
+    Args:
+        app: Внутреннее ASGI-приложение.
+        capture (RequestCapture): Журнал.
+        paths: Маршруты с телом формата /predict.
+        decode: Функция (тело, Content-Type) -> объект.
+    """
+
+    def __init__(self, app, capture, paths, decode):
+        self.app = app
+        self.capture = capture
+        self.paths = frozenset(paths)
+        self.decode = decode
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths
+                or not self.capture.sample()):
+            await self.app(scope, receive, send)
+            return
+
+        received = time.time()
+        body = await _read_body(receive)
+        try:
+            payload = self.decode(body, _header(scope, b"content-type"))
+        except ValueError:
+            pass
+        else:
+            scope.setdefault("state", {})[PARSED_BODY] = payload
+            # Нестандартные тела отклонит pydantic, в журнал они не попадают
+            row = normalize(payload)
+            if row is not None:
+                self.capture.write(row, received)
+        await self.app(scope, _replay(body, receive), send)
+
+
+def read_capture(path):
+    """Читает журнал в структурированный массив с полями RECORD_DTYPE, упорядоченный по времени."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: not a capture file")
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a capture file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported capture format version {version}")
+    # Незаконченная последняя запись (процесс убит во время записи) отбрасывается
+    usable = (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=usable // RECORD.size, offset=HEADER.size)
+    return np.sort(records, order='time', kind='stable')
+
+
+def to_rows(records):
+    """Матрица признаков N x 5 в порядке [Temperature, Wind_Speed, Precipitation, Sex, Age]."""
+    return np.column_stack([records[name].astype(float) for name in
+                            ('Temperature', 'Wind_Speed', 'Precipitation', 'Sex', 'Age')])
@@ -0,0 +1,180 @@
+"""
+Скомпилированный каталог одежды из file.csv для генератора выборки и сервера.
+
+Вместо вложенных словарей часть_тела -> категория -> [вещи] каталог хранит
+для каждой части тела плотную таблицу ids[категория, k] с номерами вещей и
+counts[категория] - число настоящих вещей в строке. Категория погоды
+находится бинарным поиском по отсортированным границам температуры.
+
+Индекс строится один раз и кэшируется в .npz рядом с CSV; кэш
+пересобирается, когда меняется sha256 исходного файла.
+"""
+import csv
+import hashlib
+import os
+
+import numpy as np
+
+# Границы интервалов температуры по возрастанию; интервал i - это [EDGES[i], EDGES[i + 1])
+TEMPERATURE_EDGES = np.array([-40, -35, -30, -20, -15, -10, -5, 0, 2, 5, 10, 15, 20, 25, 30, 35, 40], dtype=float)
+
+# Категории (без осадков, с осадками) для строки searchsorted(EDGES, t, 'right'):
+# строка 0 - t < -40, строка 1 - [-40, -35), ..., последняя - t >= 40
+CATEGORY_TABLE = np.array([
+    (34, 34), (33, 34), (31, 32), (29, 30), (27, 28), (25, 26), (23, 24), (21, 22), (19, 20),
+    (17, 18), (15, 16), (13, 14), (11, 12), (9, 10), (7, 8), (5, 6), (3, 4), (1, 2),
+])
+MAX_CATEGORY = int(CATEGORY_TABLE.max())
+
+CACHE_FORMAT = 1
+
+
+def weather_category(temperature, precipitation):
+    """Категории погоды для массивов температуры и признака осадков (как get_weather_category)."""
+    rows = np.searchsorted(TEMPERATURE_EDGES, temperature, side='right')
+    return CATEGORY_TABLE[rows, (np.asarray(precipitation) != 0).astype(int)]
+
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parse_csv(path):
+    """
+    Часть тела -> категория -> [вещи] в порядке файла; некорректные строки пропускаются.
+
+    Это же чтение использует NN/generator.py (load_clothing).
+    """
+    clothing = {}
+    with open(path, encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for row in reader:
+            if len(row) < 5:
+                continue
+            name = row[0].strip()
+            body_part = row[3].strip()
+            by_category = clothing.setdefault(body_part, {})
+            for cat in row[4:]:
+                cat = cat.strip().rstrip(',')
+                if cat.isdigit():
+                    by_category.setdefault(int(cat), []).append(name)
+    return clothing
+
+
+class CatalogIndex:
+    """
+    Args:
+        parts (list): Названия частей тела.
+        names (dict): Часть тела -> массив названий вещей; последний элемент - пустая строка.
+        ids (dict): Часть тела -> int32 [MAX_CATEGORY + 1, width], номера вещей категории.
+        counts (dict): Часть тела -> int32 [MAX_CATEGORY + 1], число вещей категории.
+        source_sha256 (str): Хэш CSV, из которого построен индекс.
+    """
+
+    def __init__(self, parts, names, ids, counts, source_sha256):
+        self.parts = list(parts)
+        self.names = names
+        self.ids = ids
+        self.counts = counts
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def compile(cls, csv_path):
+        clothing = parse_csv(csv_path)
+        names, ids, counts = {}, {}, {}
+        for part, by_category in clothing.items():
+            part_names = sorted({item for items in by_category.values() for item in items})
+            index = {name: i for i, name in enumerate(part_names)}
+            width = max([len(items) for items in by_category.values()] + [1])
+            table = np.full((MAX_CATEGORY + 1, width), len(part_names), dtype=np.int32)
+            count = np.zeros(MAX_CATEGORY + 1, dtype=np.int32)
+            for category, items in by_category.items():
+                if 0 <= category <= MAX_CATEGORY:
+                    table[category, :len(items)] = [index[item] for item in items]
+                    count[category] = len(items)
+            names[part] = np.array(part_names + [''])
+            ids[part] = table
+            counts[part] = count
+        return cls(list(clothing), names, ids, counts, _sha256(csv_path))
+
+    def save(self, path):
+        arrays = {
+            'format': np.array(CACHE_FORMAT),
+            'parts': np.array(self.parts),
+            'source_sha256': np.array(self.source_sha256),
+        }
+        for i, part in enumerate(self.parts):
+            arrays[f'names_{i}'] = self.names[part]
+            arrays[f'ids_{i}'] = self.ids[part]
+            arrays[f'counts_{i}'] = self.counts[part]
+        tmp_path = f'{path}.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format']) != CACHE_FORMAT:
+                raise ValueError(f"{path}: unsupported catalog cache format")
+            parts = [str(part) for part in data['parts']]
+            names = {part: data[f'names_{i}'] for i, part in enumerate(parts)}
+            ids = {part: data[f'ids_{i}'] for i, part in enumerate(parts)}
+            counts = {part: data[f'counts_{i}'] for i, part in enumerate(parts)}
+            source_sha256 = str(data['source_sha256'])
+        return cls(parts, names, ids, counts, source_sha256)
+
+    def items(self, part, category):
+        """Вещи части тела для одной категории погоды."""
+        if part not in self.ids or not 0 <= category <= MAX_CATEGORY:
+            return []
+        return self.names[part][self.ids[part][category, :self.counts[part][category]]].tolist()
+
+    def sample(self, rng, part, categories):
+        """
+        Случайная вещь части тела для каждой категории из массива categories.
+
+        Returns:
+            tuple: (названия, маска строк, для которых нашлась хотя бы одна вещь).
+        """
+        size = len(categories)
+        if part not in self.ids:
+            return np.full(size, '', dtype=object), np.zeros(size, dtype=bool)
+        available = self.counts[part][categories]
+        choice = (rng.random(size) * available).astype(np.int32)
+        item_ids = np.where(available > 0, self.ids[part][categories, choice], len(self.names[part]) - 1)
+        return self.names[part].astype(object)[item_ids], available > 0
+
+
+def default_cache_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.catalog.npz'
+
+
+def load_catalog(csv_path, cache_path=None):
+    """
+    Загружает индекс из кэша или компилирует его из CSV.
+
+    Кэш считается устаревшим, если sha256 CSV не совпадает с сохранённым.
+    Если CSV нет (например, в образе сервера лежит только кэш), кэш
+    используется как есть.
+    """
+    cache_path = cache_path or default_cache_path(csv_path)
+    csv_exists = os.path.exists(csv_path)
+
+    if os.path.exists(cache_path):
+        try:
+            catalog = CatalogIndex.load(cache_path)
+        except (OSError, ValueError, KeyError):
+            catalog = None
+        if catalog is not None and (not csv_exists or catalog.source_sha256 == _sha256(csv_path)):
+            return catalog
+
+    if not csv_exists:
+        raise FileNotFoundError(csv_path)
+    catalog = CatalogIndex.compile(csv_path)
+    try:
+        catalog.save(cache_path)
+    except OSError:
+        pass
+    return catalog
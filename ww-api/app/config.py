@@ -0,0 +1,97 @@
+import os
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Артефакты модели и движок инференса: "keras", "numpy" (веса из .h5),
+# "artifact" (numpy поверх единого mmap-файла из app.artifact)
+# или "tflite" (TFLITE_PATH из NN/main.py, по интерпретатору на поток)
+MODEL_PATH = os.getenv("WW_MODEL_PATH", "model/model.h5")
+SCALER_PATH = os.getenv("WW_SCALER_PATH", "model/scaler.pkl")
+ENCODERS_PATH = os.getenv("WW_ENCODERS_PATH", "model/label_encoders.pkl")
+ARTIFACT_PATH = os.getenv("WW_ARTIFACT_PATH", "model/model.wwm")
+TFLITE_PATH = os.getenv("WW_TFLITE_PATH", "model/model.tflite")
+TFLITE_THREADS = int(os.getenv("WW_TFLITE_THREADS", "1"))
+BACKEND = os.getenv("WW_BACKEND", "keras")
+
+# Каталог одежды (NN/file.csv, в образе - /opt/ww-api/file.csv) и его скомпилированный индекс;
+# без WW_CATALOG_CACHE индекс лежит рядом с CSV и общий с NN/generator.py
+CATALOG_CSV = os.getenv("WW_CATALOG_CSV", os.path.join("..", "NN", "file.csv"))
+CATALOG_CACHE = os.getenv("WW_CATALOG_CACHE")
+
+# Число воркеров uvicorn; общие веса между процессами есть только у backend "artifact"
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Микробатчинг POST /predict: одиночные запросы склеиваются в одну матрицу
+BATCHING_ENABLED = _env_bool("WW_BATCHING", True)
+BATCH_MAX_SIZE = int(os.getenv("WW_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("WW_BATCH_MAX_WAIT_MS", "2"))
+
+# POST /predict/batch: максимальное число записей в одном запросе
+BULK_MAX_RECORDS = int(os.getenv("WW_BULK_MAX_RECORDS", "10000"))
+
+# POST /predict/forecast: максимальное число часов в одном прогнозе
+FORECAST_MAX_HOURS = int(os.getenv("WW_FORECAST_MAX_HOURS", "384"))
+
+# Кэш рекомендаций по квантованным входам (выключен по умолчанию)
+CACHE_ENABLED = _env_bool("WW_CACHE", False)
+CACHE_SIZE = int(os.getenv("WW_CACHE_SIZE", "65536"))
+CACHE_STEPS = (
+    float(os.getenv("WW_CACHE_TEMP_STEP", "0.5")),
+    float(os.getenv("WW_CACHE_WIND_STEP", "0.5")),
+    float(os.getenv("WW_CACHE_PRECIP_STEP", "0.1")),
+    1.0,  # Sex
+    1.0,  # Age
+)
+
+# HTTP-кэширование POST /predict: ETag по входу и версии модели, 304 на If-None-Match,
+# и необязательный общий кэш готовых ответов в памяти процесса
+ETAG_ENABLED = _env_bool("WW_ETAG", True)
+HTTP_MAX_AGE = int(os.getenv("WW_HTTP_MAX_AGE", "300"))
+RESPONSE_CACHE_ENABLED = _env_bool("WW_RESPONSE_CACHE", False)
+RESPONSE_CACHE_SIZE = int(os.getenv("WW_RESPONSE_CACHE_SIZE", "65536"))
+
+# Горячая перезагрузка: фоновая проверка файлов модели и подмена без остановки сервера
+RELOAD_WATCH = _env_bool("WW_RELOAD_WATCH", False)
+RELOAD_INTERVAL = float(os.getenv("WW_RELOAD_INTERVAL", "5"))
+
+# Допуск к инференсу: не больше ADMISSION_CONCURRENCY запросов в работе и ADMISSION_QUEUE в очереди;
+# запрос, не дождавшийся слота за ADMISSION_DEADLINE_MS, получает 503 с Retry-After
+ADMISSION_ENABLED = _env_bool("WW_ADMISSION", True)
+ADMISSION_CONCURRENCY = int(os.getenv("WW_ADMISSION_CONCURRENCY", "64"))
+ADMISSION_QUEUE = int(os.getenv("WW_ADMISSION_QUEUE", "256"))
+ADMISSION_DEADLINE_MS = float(os.getenv("WW_ADMISSION_DEADLINE_MS", "1000"))
+ADMISSION_RETRY_AFTER = int(os.getenv("WW_ADMISSION_RETRY_AFTER", "1"))
+
+# Выборочная запись входов /predict и /predict/batch в бинарный журнал (app.capture);
+# без WW_CAPTURE_PATH запись выключена
+CAPTURE_PATH = os.getenv("WW_CAPTURE_PATH")
+CAPTURE_SAMPLE_RATE = float(os.getenv("WW_CAPTURE_SAMPLE_RATE", "0.01"))
+CAPTURE_MAX_BYTES = int(float(os.getenv("WW_CAPTURE_MAX_MB", "256")) * (1 << 20))
+
+# Профилирование по запросу (app.profiling): стеки пишутся в PROFILE_DIR в формате collapsed stacks.
+# WW_PROFILE=1 включает его при старте на PROFILE_SECONDS секунд (0 - до POST /admin/profile/stop);
+# при PROFILE_SAMPLE_RATE < 1 стеки снимаются, только пока обрабатываются запросы из выборки
+PROFILE_ON_START = _env_bool("WW_PROFILE", False)
+PROFILE_DIR = os.getenv("WW_PROFILE_DIR", "profiles")
+PROFILE_SECONDS = float(os.getenv("WW_PROFILE_SECONDS", "60"))
+PROFILE_SAMPLE_RATE = float(os.getenv("WW_PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_INTERVAL_MS = float(os.getenv("WW_PROFILE_INTERVAL_MS", "5"))
+
+# Эндпоинты /admin/* (перезагрузка модели, профилирование) принимают только
+# заголовок "Authorization: Bearer <WW_ADMIN_TOKEN>"; без токена они выключены и отвечают 404
+ADMIN_TOKEN = os.getenv("WW_ADMIN_TOKEN") or None
+
+# Если модель не загрузилась при старте, процесс завершается с кодом 1, чтобы
+# оркестратор его перезапустил, а не держал вечно неготовым
+STARTUP_FAIL_FAST = _env_bool("WW_STARTUP_FAIL_FAST", True)
+
+# Прогрев при старте: синтетические батчи указанных размеров
+WARMUP_ENABLED = _env_bool("WW_WARMUP", True)
+WARMUP_BATCH_SIZES = [int(size) for size in os.getenv("WW_WARMUP_BATCH_SIZES", "1,8,32").split(",") if size.strip()]
+WARMUP_ROUNDS = int(os.getenv("WW_WARMUP_ROUNDS", "2"))
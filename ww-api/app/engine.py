@@ -0,0 +1,286 @@
+import re
+import threading
+
+import numpy as np
+
+# Порядок выходов модели из NN/neiro.py
+BODY_PARTS = ('head', 'arms', 'neck', 'body', 'legs', 'shoes')
+TRUNK_LAYERS = ('Dense_1', 'Dense_2')
+
+
+class KerasBackend:
+    """Исходный путь: sklearn StandardScaler + keras model.predict."""
+
+    name = 'keras'
+
+    def __init__(self, model_path, scaler):
+        from tensorflow.keras.models import load_model
+
+        self.model = load_model(model_path)
+        self.scaler = scaler
+
+    def scale(self, input_array):
+        return self.scaler.transform(input_array)
+
+    def forward(self, input_scaled):
+        return self.model.predict(input_scaled, verbose=0)
+
+
+class NumpyBackend:
+    """
+    Прямой проход Input(5) -> Dense(128) -> Dense(64) -> 6 softmax-голов на NumPy.
+
+    StandardScaler сложен в первый слой: (x - mean) / scale @ W + b
+    равно x @ (W / scale[:, None]) + (b - (mean / scale) @ W), поэтому
+    scale() ничего не делает, а forward() принимает сырые признаки.
+    Все головы объединены в одну матрицу, чтобы обойтись одним matmul.
+    """
+
+    name = 'numpy'
+
+    def __init__(self, trunk, head_kernel, head_bias, head_sizes, mean=None, scale=None, dtype=np.float32):
+        """
+        Args:
+            trunk (list): Пары (kernel, bias) скрытых relu-слоёв по порядку.
+            head_kernel, head_bias: Веса всех голов, склеенные по выходной оси в порядке BODY_PARTS.
+            head_sizes (list): Число классов каждой головы.
+            mean, scale: Параметры StandardScaler; если заданы, складываются в первый слой.
+
+        Массивы нужного dtype не копируются, поэтому веса из mmap-артефакта
+        остаются общими страницами (копируется только первый слой при сложении).
+        """
+        trunk = list(trunk)
+        if mean is not None:
+            mean = np.asarray(mean, dtype=np.float64)
+            scale = np.asarray(scale, dtype=np.float64)
+            w, b = (np.asarray(a, dtype=np.float64) for a in trunk[0])
+            trunk[0] = (w / scale[:, None], b - (mean / scale) @ w)
+
+        self.dtype = dtype
+        self.trunk = [(np.asarray(w, dtype=dtype), np.asarray(b, dtype=dtype)) for w, b in trunk]
+        self.head_kernel = np.asarray(head_kernel, dtype=dtype)
+        self.head_bias = np.asarray(head_bias, dtype=dtype)
+        self.head_splits = np.cumsum(head_sizes)[:-1]
+
+    @classmethod
+    def from_layers(cls, trunk, heads, mean=None, scale=None, dtype=np.float32):
+        """Собирает движок из отдельных пар (kernel, bias) голов в порядке BODY_PARTS."""
+        return cls(
+            trunk,
+            np.concatenate([w for w, _ in heads], axis=1),
+            np.concatenate([b for _, b in heads]),
+            [np.shape(b)[0] for _, b in heads],
+            mean=mean,
+            scale=scale,
+            dtype=dtype,
+        )
+
+    @classmethod
+    def from_h5(cls, model_path, scaler=None):
+        """Достаёт веса из keras .h5 (model.h5 / clothing_recommendation_model.h5) без TensorFlow."""
+        weights = read_h5_weights(model_path)
+        mean = scale = None
+        if scaler is not None:
+            mean, scale = scaler.mean_, scaler.scale_
+        return cls.from_layers(
+            [weights[name] for name in TRUNK_LAYERS],
+            [weights[name] for name in BODY_PARTS],
+            mean=mean,
+            scale=scale,
+        )
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Движок поверх ModelArtifact (см. app.artifact) без копирования весов."""
+        return cls(
+            artifact.trunk,
+            artifact.arrays['heads/kernel'],
+            artifact.arrays['heads/bias'],
+            artifact.head_sizes,
+            mean=artifact.arrays['scaler/mean'],
+            scale=artifact.arrays['scaler/scale'],
+        )
+
+    def scale(self, input_array):
+        # Масштабирование уже сложено в первый слой
+        return np.asarray(input_array, dtype=self.dtype)
+
+    def forward(self, x):
+        h = x
+        for w, b in self.trunk:
+            h = h @ w
+            h += b
+            np.maximum(h, 0, out=h)
+
+        logits = h @ self.head_kernel
+        logits += self.head_bias
+
+        predictions = []
+        for z in np.split(logits, self.head_splits, axis=1):
+            z = np.exp(z - z.max(axis=1, keepdims=True))
+            z /= z.sum(axis=1, keepdims=True)
+            predictions.append(z)
+        return predictions
+
+
+def _tflite_interpreter_class():
+    """Лёгкий tflite_runtime, если установлен, иначе интерпретатор из полного TensorFlow."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def order_outputs(outputs):
+    """
+    Упорядочивает выходы сигнатуры TFLite по BODY_PARTS.
+
+    NN/main.py экспортирует выходы с именами частей тела; from_keras_model
+    под Keras 3 называет их output_0..output_5 в порядке выходов модели.
+
+    Args:
+        outputs (dict): Имя выхода -> детали тензора.
+    """
+    if set(outputs) == set(BODY_PARTS):
+        return [outputs[part] for part in BODY_PARTS]
+    numbered = {}
+    for name in outputs:
+        match = re.fullmatch(r'output_(\d+)', name)
+        if match:
+            numbered[int(match.group(1))] = outputs[name]
+    if sorted(numbered) == list(range(len(BODY_PARTS))):
+        return [numbered[i] for i in range(len(BODY_PARTS))]
+    raise ValueError(f"TFLite model outputs {sorted(outputs)} do not match {BODY_PARTS}")
+
+
+class TFLiteBackend:
+    """
+    Прямой проход по .tflite (NN/main.py) с интерпретатором на каждый поток.
+
+    Интерпретатор не потокобезопасен, поэтому каждый поток (микробатчер,
+    пул FastAPI, прогрев) получает свой через threading.local; байты модели
+    читаются один раз и общие. Вход пишется в заранее выделенный буфер;
+    тензоры переразмечаются, только когда батч в него не помещается, и
+    ёмкость растёт до следующей степени двойки, не уменьшаясь. Меньший
+    батч занимает начало буфера, лишние строки выходов отрезаются.
+
+    В .tflite только сеть, StandardScaler применяется в scale().
+    """
+
+    name = 'tflite'
+
+    def __init__(self, model_path, scaler, num_threads=1):
+        with open(model_path, 'rb') as f:
+            self.model_content = f.read()
+        self.mean = np.asarray(scaler.mean_, dtype=np.float32)
+        self.inv_scale = np.asarray(1.0 / scaler.scale_, dtype=np.float32)
+        self.num_threads = num_threads
+        self._interpreter_class = _tflite_interpreter_class()
+        self._local = threading.local()
+        # Проверяем модель и порядок выходов сразу, а не на первом запросе
+        self._slot()
+
+    def _slot(self):
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            slot = self._local.slot = _TFLiteSlot(
+                self._interpreter_class(model_content=self.model_content, num_threads=self.num_threads)
+            )
+        return slot
+
+    def scale(self, input_array):
+        x = np.asarray(input_array, dtype=np.float32) - self.mean
+        x *= self.inv_scale
+        return x
+
+    def forward(self, input_scaled):
+        return self._slot().run(input_scaled)
+
+
+class _TFLiteSlot:
+    """Интерпретатор одного потока с индексами тензоров и буфером входа."""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        signatures = interpreter.get_signature_list()
+        if signatures:
+            runner = interpreter.get_signature_runner()
+            (input_details,) = runner.get_input_details().values()
+            output_details = order_outputs(runner.get_output_details())
+        else:
+            # Модель без сигнатур: порядок выходов как у keras-модели
+            (input_details,) = interpreter.get_input_details()
+            output_details = interpreter.get_output_details()
+            if len(output_details) != len(BODY_PARTS):
+                raise ValueError(f"TFLite model has {len(output_details)} outputs, expected {len(BODY_PARTS)}")
+
+        self.input_index = input_details['index']
+        self.input_dtype = input_details['dtype']
+        self.input_quantization = input_details['quantization']
+        self.outputs = [(d['index'], d['dtype'], d['quantization']) for d in output_details]
+        self.n_features = int(input_details['shape'][-1])
+        self.capacity = 0
+        self.buffer = None
+
+    def _resize(self, capacity):
+        self.interpreter.resize_tensor_input(self.input_index, [capacity, self.n_features], strict=False)
+        self.interpreter.allocate_tensors()
+        self.buffer = np.zeros((capacity, self.n_features), dtype=self.input_dtype)
+        self.capacity = capacity
+
+    def run(self, x):
+        n = len(x)
+        if n > self.capacity:
+            self._resize(1 << (n - 1).bit_length())
+
+        if self.input_dtype == np.float32:
+            self.buffer[:n] = x
+        else:
+            scale, zero_point = self.input_quantization
+            self.buffer[:n] = np.clip(np.round(x / scale + zero_point), -128, 127)
+        self.interpreter.set_tensor(self.input_index, self.buffer)
+        self.interpreter.invoke()
+
+        predictions = []
+        for index, dtype, (scale, zero_point) in self.outputs:
+            value = self.interpreter.get_tensor(index)[:n]
+            if dtype != np.float32:
+                value = (value.astype(np.float32) - zero_point) * scale
+            predictions.append(value)
+        return predictions
+
+
+def read_h5_weights(model_path):
+    """
+    Читает веса Dense-слоёв из keras .h5 через h5py.
+
+    Returns:
+        dict: Имя слоя -> (kernel, bias).
+    """
+    import h5py
+
+    weights = {}
+    with h5py.File(model_path, 'r') as f:
+        root = f['model_weights'] if 'model_weights' in f else f
+        for layer_name in root.attrs['layer_names']:
+            layer_name = layer_name.decode() if isinstance(layer_name, bytes) else layer_name
+            group = root[layer_name]
+            names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs['weight_names']]
+            if len(names) != 2:
+                continue
+            kernel, bias = (np.array(group[n]) for n in names)
+            weights[layer_name] = (kernel, bias)
+    return weights
+
+
+def load_backend(kind, model_path, scaler, tflite_threads=1):
+    if kind == 'keras':
+        return KerasBackend(model_path, scaler)
+    if kind == 'numpy':
+        return NumpyBackend.from_h5(model_path, scaler)
+    if kind == 'tflite':
+        return TFLiteBackend(model_path, scaler, tflite_threads)
+    raise ValueError(f"Unknown backend: {kind!r}")
@@ -0,0 +1,66 @@
+"""
+Почасовой прогноз: один профиль и ряд погодных точек за один проход модели.
+
+Часы, квантующиеся в одну ячейку сетки (см. app.cache.quantize), считаются
+один раз; соседние часы с одинаковым комплектом склеиваются в отрезки.
+"""
+from .cache import quantize, snap
+
+
+def plan(rows, steps):
+    """
+    Сводит строки признаков к уникальным квантованным строкам.
+
+    Returns:
+        tuple: (уникальные строки - центры ячеек, номер уникальной строки для каждого часа).
+    """
+    unique_rows = []
+    positions = {}
+    index = []
+    previous_key = None
+    for row in rows:
+        key = quantize(row, steps)
+        # Соседние часы чаще всего совпадают: сравнение с предыдущим ключом дешевле словаря
+        if key != previous_key:
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(unique_rows)
+                unique_rows.append(snap(row, steps))
+            previous_key = key
+        index.append(position)
+    return unique_rows, index
+
+
+def _recommendation(outfit):
+    return {"recommendation": ", ".join(item for item in outfit if item and item.strip())}
+
+
+def group_runs(outfits, times=None, fields=_recommendation):
+    """
+    Склеивает подряд идущие часы с одинаковым комплектом.
+
+    Args:
+        outfits (list): Комплект (список названий) для каждого часа.
+        times (list): Необязательные метки времени часов.
+        fields: Функция комплект -> поля ответа для отрезка.
+
+    Returns:
+        list: Отрезки {"first", "last", "hours", **fields(комплект)[, "start", "end"]}, границы включительно.
+    """
+    segments = []
+    start = 0
+    for i in range(1, len(outfits) + 1):
+        if i < len(outfits) and outfits[i] == outfits[start]:
+            continue
+        segment = {
+            "first": start,
+            "last": i - 1,
+            "hours": i - start,
+            **fields(outfits[start]),
+        }
+        if times is not None:
+            segment["start"] = times[start]
+            segment["end"] = times[i - 1]
+        segments.append(segment)
+        start = i
+    return segments
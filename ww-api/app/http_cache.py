@@ -0,0 +1,236 @@
+"""
+HTTP-кэширование ответов POST /predict.
+
+Ключ строится по нормализованному телу запроса и версии модели, ETag - хэш
+ключа. Если клиент присылает совпадающий If-None-Match, middleware сразу
+отвечает 304, не заходя в приложение. С включённым общим кэшем повторный
+запрос получает сохранённое тело без pydantic, масштабирования и модели.
+Разобранное тело кладётся в scope["state"][PARSED_BODY], и приложение
+(app.serialization.NegotiatedRoute) не разбирает его второй раз.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .cache import quantize
+
+_SEX_VALUES = ("male", "female")
+
+# Ключ scope["state"] с уже разобранным телом запроса
+PARSED_BODY = "ww.parsed_body"
+
+
+def normalize(payload, steps=None):
+    """
+    Канонический вид тела /predict или None, если тело нестандартное.
+
+    Нестандартные тела (лишние типы, пропуски) не кэшируются и уходят в
+    приложение, где pydantic вернёт обычную ошибку. С steps непрерывные
+    признаки квантуются так же, как в QuantizedCache: ответы внутри ячейки
+    сетки тогда одинаковы.
+    """
+    if not isinstance(payload, dict):
+        return None
+    try:
+        numbers = [payload["Temperature"], payload["Wind_Speed"], payload["Precipitation"]]
+        sex = payload["Sex"]
+        age = payload["Age"]
+    except KeyError:
+        return None
+    if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in numbers):
+        return None
+    if sex not in _SEX_VALUES or isinstance(age, bool) or not isinstance(age, int) or age < 0:
+        return None
+    row = [float(v) for v in numbers] + [_SEX_VALUES.index(sex), age]
+    if steps is not None:
+        return quantize(row, steps)
+    return tuple(row)
+
+
+def make_etag(key, version, variant=None):
+    digest = hashlib.sha256(repr((version, key, variant)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Сравнение If-None-Match по слабому правилу (RFC 9110, 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    """Общий LRU-кэш готовых ответов: ETag -> (заголовки, тело)."""
+
+    def __init__(self, maxsize=65536):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ETagMiddleware:
+    """
+    Чистый ASGI-middleware для POST-маршрутов из paths.
+
+    Args:
+        app: Внутреннее ASGI-приложение.
+        paths: Маршруты, тело которых имеет формат /predict.
+        version: Функция без аргументов, возвращающая версию модели (None - модель не готова).
+        max_age (int): Значение max-age в Cache-Control.
+        steps: Шаги квантования входов или None.
+        cache (ResponseCache): Общий кэш ответов или None.
+        decode: Функция (тело, Content-Type) -> объект; по умолчанию json.loads.
+        variant: Функция Accept -> формат ответа; формат входит в ETag и ключ кэша.
+    """
+
+    def __init__(self, app, paths, version, max_age=300, steps=None, cache=None, decode=None, variant=None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.version = version
+        self.cache_control = f"private, max-age={max_age}".encode()
+        self.steps = steps
+        self.cache = cache
+        self.decode = decode or (lambda body, content_type: json.loads(body))
+        self.variant = variant or (lambda accept: None)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        replay = _replay(body, receive)
+
+        version = self.version()
+        key = None
+        if version is not None:
+            state = scope.setdefault("state", {})
+            if PARSED_BODY in state:
+                # Тело уже разобрал внешний middleware (запись входов)
+                key = normalize(state[PARSED_BODY], self.steps)
+            else:
+                try:
+                    payload = self.decode(body, _header(scope, b"content-type"))
+                except ValueError:
+                    pass
+                else:
+                    state[PARSED_BODY] = payload
+                    key = normalize(payload, self.steps)
+        if key is None:
+            await self.app(scope, replay, send)
+            return
+
+        etag = make_etag(key, version, self.variant(_header(scope, b"accept")))
+        headers = [(b"etag", etag.encode()), (b"cache-control", self.cache_control), (b"vary", b"Accept")]
+
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            not_modified = headers + [(b"x-model-version", version.encode())]
+            await send({"type": "http.response.start", "status": 304, "headers": not_modified})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if self.cache is not None:
+            cached = self.cache.get(etag)
+            if cached is not None:
+                cached_headers, cached_body = cached
+                await send({"type": "http.response.start", "status": 200, "headers": cached_headers})
+                await send({"type": "http.response.body", "body": cached_body})
+                return
+
+        status = None
+        response_headers = None
+        response_etag = etag
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal status, response_headers, response_etag
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if status == 200:
+                    # Модель могли подменить во время запроса: ETag строится по версии, которая ответила
+                    served_by = dict(message.get("headers", [])).get(b"x-model-version")
+                    if served_by is not None and served_by.decode() != version:
+                        response_etag = make_etag(key, served_by.decode(), self.variant(_header(scope, b"accept")))
+                    response_headers = list(message.get("headers", [])) + [
+                        (b"etag", response_etag.encode()), *headers[1:]
+                    ]
+                    message = dict(message, headers=response_headers)
+            elif message["type"] == "http.response.body" and status == 200 and self.cache is not None:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.put(response_etag, (response_headers, b"".join(chunks)))
+            await send(message)
+
+        await self.app(scope, replay, send_wrapper)
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(body, receive):
+    """receive для приложения: сначала уже прочитанное тело, затем исходный поток (disconnect)."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
@@ -1,23 +1,279 @@
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
+import asyncio
+import hmac
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import Body, Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
 import numpy as np
 import pickle
-import tensorflow 
-from tensorflow.keras.models import load_model
-from typing import Literal
+from typing import Any, Dict, List, Literal, Optional
+
+from .admission import AdmissionMiddleware
+from .artifact import file_version, load_artifact
+from .batching import MicroBatcher
+from .cache import QuantizedCache
+from .capture import CaptureMiddleware, RequestCapture
+from .catalog import load_catalog, weather_category
+from .config import (
+    ADMIN_TOKEN, ADMISSION_CONCURRENCY, ADMISSION_DEADLINE_MS, ADMISSION_ENABLED, ADMISSION_QUEUE,
+    ADMISSION_RETRY_AFTER,
+    BACKEND, BATCHING_ENABLED, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BULK_MAX_RECORDS,
+    ARTIFACT_PATH, CACHE_ENABLED, CACHE_SIZE, CACHE_STEPS, CAPTURE_MAX_BYTES, CAPTURE_PATH, CAPTURE_SAMPLE_RATE,
+    CATALOG_CACHE, CATALOG_CSV,
+    ENCODERS_PATH, ETAG_ENABLED, FORECAST_MAX_HOURS, HTTP_MAX_AGE, MODEL_PATH,
+    PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_ON_START, PROFILE_SAMPLE_RATE, PROFILE_SECONDS,
+    RELOAD_INTERVAL, RELOAD_WATCH, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_SIZE, SCALER_PATH, STARTUP_FAIL_FAST,
+    TFLITE_PATH, TFLITE_THREADS,
+    WARMUP_BATCH_SIZES, WARMUP_ENABLED, WARMUP_ROUNDS, WORKERS,
+)
+from .engine import BODY_PARTS, NumpyBackend, load_backend
+from .forecast import group_runs, plan as plan_forecast
+from .http_cache import ETagMiddleware, ResponseCache
+from .memory import memory_stats
+from .metrics import MODEL_INFO, STAGE_SECONDS, MetricsMiddleware, render as render_metrics
+from .profiling import Profiler, ProfilingMiddleware
+from .reload import FileWatcher
+from .serialization import FastJSONResponse, NegotiatedRoute, decode_body, negotiate, wants_msgpack
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# Модель загружается в фоне после старта сервера; /ready отвечает 200 только после прогрева
+ready = False
+served = None
+catalog = None
+
+
+class ServedModel:
+    """
+    Одна версия модели: движок, таблицы классов и версия.
+
+    Обработчики берут ссылку на served один раз за запрос, а перезагрузка
+    подменяет её одним присваиванием, поэтому запрос никогда не смешивает
+    движок одной версии с классами другой.
+    """
+
+    def __init__(self, backend, classes, version):
+        self.backend = backend
+        self.classes = classes
+        self.version = version
+
+
+# Загрузка и подмена модели (старт, /admin/reload, watcher) идут по одной
+_reload_lock = threading.Lock()
+
+
+def startup():
+    """Загрузка модели и прогрев с логированием длительности каждой фазы."""
+    global ready
+
+    phases = {"import": time.perf_counter() - _IMPORT_STARTED}
+
+    if WORKERS > 1 and BACKEND != 'artifact':
+        logger.warning(
+            f"WEB_CONCURRENCY={WORKERS} with backend '{BACKEND}': every worker keeps its own copy of the model, "
+            "use WW_BACKEND=artifact to share weights between workers"
+        )
+
+    started = time.perf_counter()
+    load_clothing_catalog()
+    phases["load_catalog"] = time.perf_counter() - started
+
+    # Watcher и /admin/reload работают с самого старта: под тем же замком, что и
+    # reload_model, стартовая загрузка не может подменить уже активированную новую модель
+    with _reload_lock:
+        if served is None:
+            started = time.perf_counter()
+            model = load_model()
+            phases["load_model"] = time.perf_counter() - started
+
+            if WARMUP_ENABLED:
+                started = time.perf_counter()
+                warmup(model)
+                phases["warmup"] = time.perf_counter() - started
+
+            activate(model)
+    phases["total"] = time.perf_counter() - _IMPORT_STARTED
+    ready = True
+    logger.info("Startup phases (s): " + ", ".join(f"{name}={value:.3f}" for name, value in phases.items()))
+
+
+def warmup(model):
+    """
+    Прогоняет синтетические батчи типичных размеров, чтобы первый настоящий
+    запрос не платил за трассировку графа и выделение буферов.
+
+    Тот же путь, что infer_rows, но без STAGE_SECONDS: синтетические батчи
+    не должны попадать в гистограммы стадий.
+    """
+    backend = model.backend
+    rng = np.random.default_rng(0)
+    for size in WARMUP_BATCH_SIZES:
+        input_array = np.column_stack([
+            rng.uniform(-40, 40, size),     # Temperature
+            rng.uniform(0, 30, size),       # Wind_Speed
+            rng.integers(0, 2, size),       # Precipitation
+            rng.integers(0, 2, size),       # Sex
+            rng.integers(18, 66, size),     # Age
+        ]).astype(float)
+        for _ in range(WARMUP_ROUNDS):
+            predictions = backend.forward(backend.scale(input_array))
+            for part, pred in zip(BODY_PARTS, predictions):
+                model.classes[part][np.argmax(pred, axis=1)].tolist()
+
+
+def reload_model():
+    """
+    Горячая перезагрузка: новая модель загружается и прогревается, пока
+    запросы обслуживает текущая, затем подменяет её.
+
+    Returns:
+        tuple: (ServedModel, была ли подмена); при той же версии подмены нет.
+    """
+    with _reload_lock:
+        model = load_model()
+        if served is not None and model.version == served.version:
+            return served, False
+        if WARMUP_ENABLED:
+            warmup(model)
+        activate(model)
+        return model, True
+
+
+def _reload_in_background():
+    try:
+        reload_model()
+    except Exception:
+        logger.exception("Model reload failed, keeping the current model")
+
+
+def network_path():
+    """Файл сети для движков keras, numpy и tflite."""
+    return TFLITE_PATH if BACKEND == 'tflite' else MODEL_PATH
+
+
+def model_files():
+    """Файлы, при замене которых watcher перезагружает модель."""
+    if BACKEND == 'artifact':
+        return [ARTIFACT_PATH]
+    return [network_path(), SCALER_PATH, ENCODERS_PATH]
+
 
-app = FastAPI()
+watcher = FileWatcher(model_files(), _reload_in_background, RELOAD_INTERVAL) if RELOAD_WATCH else None
 
-# Загрузка модели и вспомогательных объектов при старте приложения
-model = load_model('model/model.h5')
-if model != None:
-    print("OK")
 
-with open('model/scaler.pkl', 'rb') as f:
-    scaler = pickle.load(f)
+def _on_startup_done(task):
+    if task.cancelled() or task.exception() is None:
+        return
+    logger.error("Startup failed", exc_info=task.exception())
+    if STARTUP_FAIL_FAST:
+        # Загрузка идёт в фоне после старта uvicorn, поэтому исключение некому
+        # пробросить: завершаем процесс сами (воркер перезапустит супервизор uvicorn)
+        if capture is not None:
+            capture.flush()
+        logging.shutdown()
+        os._exit(1)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if BATCHING_ENABLED:
+        batcher.start()
+    startup_task = asyncio.create_task(run_in_threadpool(startup))
+    startup_task.add_done_callback(_on_startup_done)
+    if watcher is not None:
+        watcher.start()
+    if PROFILE_ON_START:
+        profiler.start(PROFILE_SECONDS or None, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS)
+    yield
+    if watcher is not None:
+        watcher.stop()
+    profiler.stop()
+    batcher.stop()
+    if capture is not None:
+        capture.flush()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+# Тела запросов в msgpack разбираются на уровне маршрута (см. app.serialization)
+app.router.route_class = NegotiatedRoute
+
+
+def ensure_ready():
+    if not ready:
+        raise HTTPException(status_code=503, detail="Model is not ready", headers={"Retry-After": "1"})
+
+
+def load_model():
+    """Загружает модель и таблицы классов, не трогая модель, которая сейчас обслуживает запросы."""
+    if BACKEND == 'artifact':
+        # Единый mmap-артефакт: без pickle, sklearn, h5py и TensorFlow
+        artifact = load_artifact(ARTIFACT_PATH)
+        return ServedModel(NumpyBackend.from_artifact(artifact), artifact.classes, artifact.version)
+    else:
+        with open(SCALER_PATH, 'rb') as f:
+            scaler = pickle.load(f)
+
+        with open(ENCODERS_PATH, 'rb') as f:
+            le_dict = pickle.load(f)
+
+        # Таблицы классов: inverse_transform у LabelEncoder - это просто classes_[idx]
+        classes = {part: np.asarray(le_dict[part].classes_) for part in BODY_PARTS}
+        path = network_path()
+        return ServedModel(load_backend(BACKEND, path, scaler, TFLITE_THREADS), classes, file_version(path))
+
+
+def activate(model):
+    """Атомарно делает model текущей и сбрасывает кэши рекомендаций."""
+    global served
+
+    served = model
+    if cache is not None:
+        cache.clear()
+    if response_cache is not None:
+        response_cache.clear()
+    MODEL_INFO.clear()
+    MODEL_INFO.set(1, model.version, model.backend.name)
+    logger.info(f"Model activated: backend={model.backend.name}, version={model.version}")
+
+
+def load_clothing_catalog():
+    """Загружает скомпилированный каталог одежды; без него /catalog отвечает 404."""
+    global catalog
+
+    try:
+        catalog = load_catalog(CATALOG_CSV, CATALOG_CACHE)
+    except FileNotFoundError:
+        catalog = None
+        logger.warning(f"Clothing catalog not found: {CATALOG_CSV}")
+
+
+cache = QuantizedCache(CACHE_SIZE, CACHE_STEPS) if CACHE_ENABLED else None
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE) if RESPONSE_CACHE_ENABLED else None
+
+capture = None
+if CAPTURE_PATH:
+    # У каждого воркера свой журнал: replay_capture.py сливает несколько файлов по времени
+    root, ext = os.path.splitext(CAPTURE_PATH)
+    capture_path = CAPTURE_PATH if WORKERS == 1 else f"{root}.{os.getpid()}{ext}"
+    capture = RequestCapture(capture_path, CAPTURE_SAMPLE_RATE, CAPTURE_MAX_BYTES)
+
+# Поток выборки создаётся только на время профилирования; в имени файла есть pid воркера
+profiler = Profiler(PROFILE_DIR)
+
+
+def served_version():
+    """Версия модели для ETag; None, пока модель не готова (ответы не кэшируются)."""
+    return served.version if ready else None
 
-with open('model/label_encoders.pkl', 'rb') as f:
-    le_dict = pickle.load(f)
 
 # Определение Pydantic-класса для валидации входных данных
 class InputData(BaseModel):
@@ -28,60 +284,365 @@ class InputData(BaseModel):
     Age: int = Field(ge=0)
 
 
-@app.post("/predict")
-def predict(data: InputData):
-    # Извлечение данных
-    temperature = data.Temperature
-    wind_speed = data.Wind_Speed
-    precipitation = data.Precipitation
-    sex = data.Sex
-    age = data.Age
+class WeatherPoint(BaseModel):
+    Temperature: float
+    Wind_Speed: float
+    Precipitation: float
+    time: Optional[str] = None
+
+
+class ForecastData(BaseModel):
+    Sex: Literal["male", "female"]
+    Age: int = Field(ge=0)
+    hours: List[WeatherPoint] = Field(min_length=1, max_length=FORECAST_MAX_HOURS)
+
+
+# Преобразование пола
+SEX_MAPPING = {'male': 0, 'female': 1}
+
 
-    # Преобразование пола
-    sex_mapping = {'male': 0, 'female': 1}
-    sex_numeric = sex_mapping[sex]
+def to_row(data: InputData):
+    """Формирует строку признаков [Temperature, Wind_Speed, Precipitation, Sex, Age]."""
+    return [data.Temperature, data.Wind_Speed, data.Precipitation, SEX_MAPPING[data.Sex], data.Age]
 
-    # Формирование входного массива
-    input_array = np.array([[temperature, wind_speed, precipitation, sex_numeric, age]], dtype=float)
+
+def infer_rows(input_array, model=None):
+    """
+    Прогоняет матрицу признаков N x 5 через scaler и модель за один вызов.
+
+    Args:
+        model (ServedModel): Версия модели; по умолчанию текущая.
+
+    Returns:
+        list: N комплектов в порядке строк; комплект - список названий в порядке
+        BODY_PARTS, пустая строка - для части тела без одежды.
+    """
+    model = model or served
+    backend = model.backend
 
     # Масштабирование входных данных
-    input_scaled = scaler.transform(input_array)
-
-    # Предсказание модели
-    predictions = model.predict(input_scaled)
-
-    # Предполагается, что модель возвращает список предсказаний по категориям одежды,
-    # например: predictions = [pred_head, pred_arms, pred_neck, pred_body, pred_legs, pred_shoes]
-    # где каждый пред_* - это массив вероятностей для соответствующей категории
-    head_pred = np.argmax(predictions[0], axis=1)
-    arms_pred = np.argmax(predictions[1], axis=1)
-    neck_pred = np.argmax(predictions[2], axis=1)
-    body_pred = np.argmax(predictions[3], axis=1)
-    legs_pred = np.argmax(predictions[4], axis=1)
-    shoes_pred = np.argmax(predictions[5], axis=1)
-
-    head_recommend = le_dict['head'].inverse_transform(head_pred)
-    arms_recommend = le_dict['arms'].inverse_transform(arms_pred)
-    neck_recommend = le_dict['neck'].inverse_transform(neck_pred)
-    body_recommend = le_dict['body'].inverse_transform(body_pred)
-    legs_recommend = le_dict['legs'].inverse_transform(legs_pred)
-    shoes_recommend = le_dict['shoes'].inverse_transform(shoes_pred)
-
-    # Формирование итогового комплекта
-    complete_outfit = [
-        head_recommend[0],
-        arms_recommend[0],
-        neck_recommend[0],
-        body_recommend[0],
-        legs_recommend[0],
-        shoes_recommend[0]
-    ]
+    with STAGE_SECONDS.time("scale"):
+        input_scaled = backend.scale(input_array)
+
+    # Предсказание модели: predictions = [pred_head, pred_arms, pred_neck, pred_body, pred_legs, pred_shoes]
+    with STAGE_SECONDS.time("forward"):
+        predictions = backend.forward(input_scaled)
+
+    # Каждый пред_* - это массив вероятностей для соответствующей категории
+    with STAGE_SECONDS.time("argmax"):
+        indices = [np.argmax(pred, axis=1) for pred in predictions]
 
+    with STAGE_SECONDS.time("decode"):
+        decoded = [model.classes[part][idx].tolist() for part, idx in zip(BODY_PARTS, indices)]
+        outfits = [list(complete_outfit) for complete_outfit in zip(*decoded)]
+    return outfits
+
+
+def outfit_fields(complete_outfit):
+    """
+    Поля ответа для комплекта: строка через запятую (как раньше) и
+    структурированный комплект по частям тела (null - без одежды).
+    """
     # Удаление пустых элементов, если есть
-    complete_outfit = [item for item in complete_outfit if item and item.strip()]
+    items = [item if item and item.strip() else None for item in complete_outfit]
+    return {
+        "recommendation": ", ".join(item for item in items if item is not None),
+        "outfit": dict(zip(BODY_PARTS, items)),
+    }
+
+
+def predict_rows(input_array):
+    """
+    То же, что infer_rows, но через кэш: модель считает только промахи.
+
+    Returns:
+        tuple: (комплекты, версия модели, которая их посчитала).
+    """
+    model = served
+    if cache is None:
+        return infer_rows(input_array, model), model.version
+
+    # Версия в ключе: запрос, начатый до перезагрузки, не положит в кэш ответ старой модели под новым ключом
+    keys = [(model.version,) + cache.key(row) for row in input_array]
+    outfits = [cache.get(key) for key in keys]
+    missed = [i for i, outfit in enumerate(outfits) if outfit is None]
+    if missed:
+        snapped = np.array([cache.snap(input_array[i]) for i in missed], dtype=float)
+        for i, outfit in zip(missed, infer_rows(snapped, model)):
+            outfits[i] = outfit
+            cache.put(keys[i], outfit)
+    return outfits, model.version
+
+
+def infer_versioned(input_array):
+    """infer_rows для микробатчера: каждая строка получает версию модели, которая её посчитала."""
+    model = served
+    return [(model.version, outfit) for outfit in infer_rows(input_array, model)]
+
+
+batcher = MicroBatcher(infer_versioned, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS)
+
+
+def versioned_response(request: Request, content, version):
+    """Ответ с версией модели в теле и в заголовке X-Model-Version."""
+    content["model_version"] = version
+    return negotiate(request, content, headers={"X-Model-Version": version})
+
+
+def observe_parse_validate(request: Request):
+    """
+    Время от получения запроса middleware до входа в обработчик: чтение тела, JSON, pydantic.
+
+    Ожидание слота в AdmissionMiddleware вычитается, оно идёт в стадию queue.
+    """
+    received = request.scope.get("ww.received")
+    if received is not None:
+        elapsed = time.perf_counter() - received - request.scope.get("ww.queued", 0.0)
+        STAGE_SECONDS.observe(max(elapsed, 0.0), "parse_validate")
+
+
+@app.post("/predict")
+async def predict(data: InputData, request: Request):
+    observe_parse_validate(request)
+    ensure_ready()
+    row = to_row(data)
+    version = served.version
+
+    key = None
+    complete_outfit = None
+    if cache is not None:
+        key = cache.key(row)
+        complete_outfit = cache.get((version,) + key)
+        row = cache.snap(row)
+
+    if complete_outfit is None:
+        if BATCHING_ENABLED:
+            # Одиночные запросы склеиваются фоновым потоком в одну матрицу
+            version, complete_outfit = await asyncio.wrap_future(batcher.submit(row))
+        else:
+            input_array = np.array([row], dtype=float)
+            version, complete_outfit = (await run_in_threadpool(infer_versioned, input_array))[0]
+        if key is not None:
+            cache.put((version,) + key, complete_outfit)
+
+    # Возврат итоговой рекомендации строкой через запятую и по частям тела
+    return versioned_response(request, outfit_fields(complete_outfit), version)
+
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request, records: List[Any] = Body(...)):
+    """
+    Оценивает массив записей в формате InputData одним векторизованным проходом.
+
+    Результаты возвращаются в порядке входа; невалидная запись получает
+    собственный элемент с ошибкой и не мешает остальным.
+    """
+    ensure_ready()
+    if len(records) > BULK_MAX_RECORDS:
+        raise HTTPException(status_code=413, detail=f"Too many records: {len(records)} > {BULK_MAX_RECORDS}")
+
+    results: List[Dict[str, Any]] = [None] * len(records)
+    rows = []
+    row_indices = []
+    for i, record in enumerate(records):
+        try:
+            data = InputData.model_validate(record)
+        except ValidationError as e:
+            results[i] = {"error": [
+                {"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]}
+                for err in e.errors()
+            ]}
+            continue
+        rows.append(to_row(data))
+        row_indices.append(i)
+    observe_parse_validate(request)
+    if capture is not None:
+        for row in rows:
+            capture.record(row)
+
+    if rows:
+        input_array = np.array(rows, dtype=float)
+        outfits, version = await run_in_threadpool(predict_rows, input_array)
+        for i, complete_outfit in zip(row_indices, outfits):
+            results[i] = outfit_fields(complete_outfit)
+    else:
+        version = served.version
+
+    return versioned_response(request, {"results": results}, version)
+
+
+@app.post("/predict/forecast")
+async def predict_forecast(data: ForecastData, request: Request):
+    """
+    Комплекты на каждый час прогноза для одного профиля.
+
+    Часы с одинаковыми квантованными входами считаются один раз, все
+    уникальные строки проходят через модель одним батчем; в ответе подряд
+    идущие часы с одинаковым комплектом склеены в отрезки.
+    """
+    observe_parse_validate(request)
+    ensure_ready()
+    sex = SEX_MAPPING[data.Sex]
+    rows = [[point.Temperature, point.Wind_Speed, point.Precipitation, sex, data.Age] for point in data.hours]
+    unique_rows, index = plan_forecast(rows, CACHE_STEPS)
+
+    outfits, version = await run_in_threadpool(predict_rows, np.array(unique_rows, dtype=float))
+
+    times = [point.time for point in data.hours]
+    return versioned_response(request, {
+        "hours": len(rows),
+        "scored": len(unique_rows),
+        "segments": group_runs([outfits[i] for i in index], times if any(times) else None, outfit_fields),
+    }, version)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness():
+    ensure_ready()
+    return {"status": "ready", "backend": served.backend.name, "model_version": served.version}
+
+
+@app.get("/catalog")
+def catalog_lookup(temperature: float, precipitation: float = 0.0):
+    """Категория погоды и допустимые вещи каталога для каждой части тела."""
+    if catalog is None:
+        raise HTTPException(status_code=404, detail="Clothing catalog is not loaded")
+    category = int(weather_category(temperature, precipitation))
+    return {
+        "category": category,
+        "items": {part: catalog.items(part, category) for part in catalog.parts},
+    }
+
+
+@app.get("/stats/batching")
+def batching_stats():
+    return {"enabled": BATCHING_ENABLED, **batcher.stats()}
+
+
+@app.get("/stats/cache")
+def cache_stats():
+    stats = {"enabled": False} if cache is None else {"enabled": True, **cache.stats()}
+    stats["responses"] = {"enabled": False} if response_cache is None else {"enabled": True, **response_cache.stats()}
+    return stats
+
+
+@app.get("/stats/capture")
+def capture_stats():
+    if capture is None:
+        return {"enabled": False}
+    return {"enabled": True, **capture.stats()}
+
+
+@app.get("/stats/memory")
+def worker_memory():
+    return {"backend": BACKEND, "workers": WORKERS, **memory_stats()}
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """
+    Допуск к /admin/*: заголовок Authorization: Bearer <WW_ADMIN_TOKEN>.
+
+    Без настроенного токена эндпоинты выключены и неотличимы от несуществующих.
+    """
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.post("/admin/reload", dependencies=[Depends(require_admin)])
+def admin_reload(background: bool = False):
+    """
+    Перезагружает модель с диска без остановки сервера.
+
+    Новая версия загружается и прогревается, пока запросы обслуживает
+    текущая; с background=true ответ 202 приходит сразу.
+    """
+    if background:
+        threading.Thread(target=_reload_in_background, name="model-reload", daemon=True).start()
+        return FastJSONResponse({"status": "reloading"}, status_code=202)
+    try:
+        model, swapped = reload_model()
+    except Exception as e:
+        logger.exception("Model reload failed, keeping the current model")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+    return {
+        "status": "reloaded" if swapped else "unchanged",
+        "backend": model.backend.name,
+        "model_version": model.version,
+        # Перезагружен только этот воркер, см. WW_RELOAD_WATCH
+        "pid": os.getpid(),
+    }
+
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+def admin_profile_status():
+    return profiler.status()
+
+
+@app.post("/admin/profile/start", dependencies=[Depends(require_admin)])
+def admin_profile_start(
+    seconds: float = PROFILE_SECONDS,
+    sample_rate: float = PROFILE_SAMPLE_RATE,
+    interval_ms: float = PROFILE_INTERVAL_MS,
+):
+    """
+    Включает профилирование на seconds секунд (0 - до /admin/profile/stop).
+
+    Профиль снимается только в воркере, принявшем запрос.
+    """
+    if not 0.0 < sample_rate <= 1.0 or interval_ms <= 0 or seconds < 0:
+        raise HTTPException(status_code=422, detail="Expected 0 < sample_rate <= 1, interval_ms > 0, seconds >= 0")
+    try:
+        profiler.start(seconds or None, sample_rate, interval_ms)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profiler.status()
+
+
+@app.post("/admin/profile/stop", dependencies=[Depends(require_admin)])
+def admin_profile_stop():
+    path = profiler.stop()
+    if path is None:
+        raise HTTPException(status_code=409, detail="Profiler has not been started")
+    return {"profile": path, **profiler.status()}
 
-    # Возврат итоговой рекомендации строкой или списком
-    # Если нужен именно строковый вывод, например через запятую:
-    result_str = ", ".join(complete_outfit)
 
-    return {"recommendation": result_str}
+# Порядок снаружи внутрь: метрики -> запись входов -> ETag/кэш ответов -> допуск -> профилирование -> приложение,
+# поэтому ответы из кэша и 304 не занимают слоты инференса, а сброшенные запросы видны в метриках
+app.add_middleware(ProfilingMiddleware, profiler=profiler, paths=["/predict", "/predict/batch", "/predict/forecast"])
+if ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        paths=["/predict", "/predict/batch", "/predict/forecast"],
+        max_concurrency=ADMISSION_CONCURRENCY,
+        max_queue=ADMISSION_QUEUE,
+        deadline_ms=ADMISSION_DEADLINE_MS,
+        retry_after=ADMISSION_RETRY_AFTER,
+    )
+if ETAG_ENABLED:
+    app.add_middleware(
+        ETagMiddleware,
+        paths=["/predict"],
+        version=served_version,
+        max_age=HTTP_MAX_AGE,
+        steps=CACHE_STEPS if CACHE_ENABLED else None,
+        cache=response_cache,
+        decode=decode_body,
+        variant=lambda accept: "msgpack" if wants_msgpack(accept) else "json",
+    )
+if capture is not None:
+    # Снаружи ETag: в журнал попадают и ответы 304, и попадания в кэш ответов
+    app.add_middleware(CaptureMiddleware, capture=capture, paths=["/predict"], decode=decode_body)
+app.add_middleware(MetricsMiddleware, routes=[route.path for route in app.routes])
@@ -0,0 +1,33 @@
+import os
+import resource
+
+# Поля /proc/self/smaps_rollup, которые показывают, сколько памяти процесс делит с соседями
+_SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def memory_stats():
+    """
+    Память текущего воркера в килобайтах.
+
+    PSS делит каждую общую страницу поровну между процессами, которые её
+    используют, поэтому сумма PSS по воркерам - честная оценка общей памяти
+    сервиса. На системах без smaps_rollup возвращается только пиковый RSS.
+    """
+    stats = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in _SMAPS_FIELDS:
+                    stats[_SMAPS_FIELDS[name]] = int(rest.split()[0])
+    except OSError:
+        pass
+    stats["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return stats
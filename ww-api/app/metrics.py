@@ -0,0 +1,194 @@
+"""
+Минимальные метрики в текстовом формате Prometheus без внешних зависимостей.
+
+Каждое наблюдение - bisect по границам корзин и инкремент под блокировкой,
+поэтому инструментацию можно держать включённой в продакшене.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин задержек в секундах: от 50 мкс до 10 с
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+REGISTRY = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{suffix} {_format_value(total)}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter('ww_requests_total', 'HTTP requests by route and status code.', ('route', 'status'))
+REQUEST_SECONDS = Histogram('ww_request_duration_seconds', 'HTTP request latency by route.', ('route',))
+IN_FLIGHT = Gauge('ww_requests_in_flight', 'HTTP requests currently being served.')
+STAGE_SECONDS = Histogram(
+    'ww_predict_stage_seconds',
+    'Time spent in each predict pipeline stage (per model call, a batch counts once).',
+    ('stage',),
+)
+MODEL_INFO = Gauge('ww_model_info', 'Currently served model version and backend.', ('version', 'backend'))
+SHED = Counter('ww_shed_requests_total', 'Requests rejected with 503 by admission control.', ('route', 'reason'))
+QUEUE_SECONDS = Histogram('ww_admission_queue_seconds', 'Time admitted requests waited for an inference slot.', ('route',))
+ADMISSION_QUEUE_DEPTH = Gauge('ww_admission_queue_depth', 'Requests waiting for an inference slot.')
+ADMISSION_IN_FLIGHT = Gauge('ww_admission_in_flight', 'Requests holding an inference slot.')
+
+
+class MetricsMiddleware:
+    """
+    Чистый ASGI-middleware: счётчик запросов, задержка по маршрутам, запросы в работе.
+
+    Кладёт момент получения запроса в scope["ww.received"], чтобы обработчик
+    мог отсчитать от него стадию разбора и валидации тела.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = frozenset(routes)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope['ww.received'] = started
+        route = scope['path'] if scope['path'] in self.routes else 'other'
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route)
+            REQUESTS.inc(route, str(status))
@@ -0,0 +1,171 @@
+"""
+Профилирование по запросу: выборка стеков всех потоков через sys._current_frames.
+
+Пока профилирование выключено, поток выборки не существует, а middleware
+только читает один атрибут. Во включённом состоянии поток каждые
+interval секунд снимает стеки потоков, занятых работой (ожидание в
+threading/queue/selectors отбрасывается), и копит их в счётчике. При
+sample_rate < 1 стеки снимаются только пока в работе есть хотя бы один
+запрос, попавший в выборку. Итог пишется в формате collapsed stacks
+("кадр;кадр;кадр число"), который понимают flamegraph.pl, speedscope и
+inferno.
+
+Стеки - питоновские: вызовы внутри TensorFlow, numpy и sklearn видны как
+кадр Python, из которого ушли в нативный код.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+# Кадры, на которых поток простаивает: такие стеки в профиль не попадают
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("base_events.py", "_run_once"),
+    ("thread.py", "_worker"),
+}
+
+
+def _label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class Profiler:
+    """
+    Args:
+        output_dir (str): Каталог для файлов .collapsed.
+    """
+
+    def __init__(self, output_dir="profiles"):
+        self.output_dir = output_dir
+        self.active = False
+        self.sample_rate = 1.0
+        self.interval = 0.005
+        self.started_at = None
+        self.deadline = None
+        self.last_profile = None
+
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._samples = 0
+        self._sampled_requests = 0
+        self._session = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, seconds=None, sample_rate=1.0, interval_ms=5.0):
+        """Включает выборку на seconds секунд (None - до stop())."""
+        with self._lock:
+            if self.active:
+                raise RuntimeError("Profiler is already running")
+            self.sample_rate = sample_rate
+            self.interval = interval_ms / 1000.0
+            self.started_at = time.time()
+            self.deadline = time.monotonic() + seconds if seconds else None
+            self._stacks = Counter()
+            self._samples = 0
+            # Запросы прошлой сессии, которые ещё выполняются, завершатся со старым номером и счётчик не тронут
+            self._session += 1
+            self._sampled_requests = 0
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self.active = True
+            self._thread.start()
+
+    def stop(self):
+        """Останавливает выборку и пишет профиль; возвращает путь к файлу или None."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return self.last_profile
+            self._thread = None
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return self.last_profile
+
+    def request_started(self):
+        """Решает, попадает ли запрос в выборку; результат нужно вернуть в request_finished."""
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            with self._lock:
+                self._sampled_requests += 1
+                return self._session
+        return None
+
+    def request_finished(self, token):
+        if token is not None:
+            with self._lock:
+                if token == self._session:
+                    self._sampled_requests -= 1
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                break
+            if self.sample_rate < 1.0 and not self._sampled_requests:
+                continue
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+        self._finish()
+
+    def _finish(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        path = os.path.join(self.output_dir, f"profile-{stamp}-{os.getpid()}.collapsed")
+        with open(path, "w") as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with self._lock:
+            self.active = False
+            self._thread = None
+            self.last_profile = path
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000.0,
+                "samples": self._samples,
+                "stacks": len(self._stacks),
+                "last_profile": self.last_profile,
+            }
+
+
+class ProfilingMiddleware:
+    """Отмечает запросы, попавшие в выборку; при выключенном профилировании - одна проверка атрибута."""
+
+    def __init__(self, app, profiler, paths):
+        self.app = app
+        self.profiler = profiler
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.active or scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        token = self.profiler.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished(token)
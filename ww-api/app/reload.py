@@ -0,0 +1,61 @@
+import logging
+import os
+import threading
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class FileWatcher:
+    """
+    Фоновый поток, который следит за файлами модели и вызывает callback после их замены.
+
+    Раз в interval секунд сравниваются mtime и размер файлов. Callback
+    вызывается, только когда новое состояние продержалось два опроса подряд,
+    чтобы не подхватить файл, который ещё копируется.
+    """
+
+    def __init__(self, paths, callback, interval=5.0):
+        self.paths = list(paths)
+        self.callback = callback
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            # Исходное состояние снимается до старта потока, чтобы не пропустить раннюю замену
+            self._thread = threading.Thread(target=self._run, args=(self._signature(),), name="model-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, current):
+        pending = None
+        while not self._stop.wait(self.interval):
+            signature = self._signature()
+            if signature == current:
+                pending = None
+                continue
+            if signature != pending or None in signature:
+                pending = signature
+                continue
+            current, pending = signature, None
+            try:
+                self.callback()
+            except Exception:
+                logger.exception("Model reload triggered by file change failed")
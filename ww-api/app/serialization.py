@@ -0,0 +1,115 @@
+"""
+Форматы тел запросов и ответов: JSON (через orjson, если он установлен) и msgpack.
+
+Формат ответа выбирается по заголовку Accept, формат запроса - по
+Content-Type. msgpack-тело подменяется для FastAPI на уже разобранный
+объект, поэтому обработчики и pydantic-модели о формате не знают. Тело,
+уже разобранное ETagMiddleware, повторно не разбирается.
+"""
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from .http_cache import PARSED_BODY
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него остаётся стандартный json
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:
+    FastJSONResponse = JSONResponse
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _media_type(value):
+    return value.split(";", 1)[0].strip().lower() if value else ""
+
+
+def is_msgpack(content_type):
+    return msgpack is not None and _media_type(content_type) in MSGPACK_TYPES
+
+
+def wants_msgpack(accept):
+    """True, если клиент явно принимает msgpack (без учёта q-весов: JSON - запасной формат)."""
+    if msgpack is None or not accept:
+        return False
+    return any(_media_type(part) in MSGPACK_TYPES for part in accept.split(","))
+
+
+def decode_body(body, content_type):
+    """Разбирает тело запроса в объект Python; ValueError при некорректном теле."""
+    if is_msgpack(content_type):
+        try:
+            return msgpack.unpackb(body)
+        except Exception as e:
+            raise ValueError(str(e)) from e
+    if orjson is not None:
+        return orjson.loads(body)
+    import json
+    return json.loads(body)
+
+
+class MsgPackResponse(Response):
+    media_type = "application/msgpack"
+
+    def render(self, content):
+        return msgpack.packb(content)
+
+
+def negotiate(request: Request, content, status_code=200, headers=None):
+    """Ответ в формате, который клиент просит в Accept."""
+    if wants_msgpack(request.headers.get("accept")):
+        return MsgPackResponse(content, status_code=status_code, headers=headers)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+class MsgPackRequest(Request):
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+
+class ParsedRequest(Request):
+    async def json(self):
+        return self.scope["state"][PARSED_BODY]
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    APIRoute, принимающий msgpack-тела.
+
+    FastAPI разбирает тело через request.json() только для JSON Content-Type,
+    поэтому для msgpack заголовок подменяется на application/json, а json()
+    возвращает результат msgpack.unpackb. Если тело уже разобрал
+    ETagMiddleware (scope["state"][PARSED_BODY]), json() возвращает его.
+    """
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            parsed = PARSED_BODY in request.scope.get("state", {})
+            if is_msgpack(request.headers.get("content-type")):
+                scope = dict(request.scope)
+                scope["headers"] = [
+                    (key, b"application/json" if key == b"content-type" else value)
+                    for key, value in request.scope["headers"]
+                ]
+                request = (ParsedRequest if parsed else MsgPackRequest)(scope, request.receive)
+            elif parsed:
+                request = ParsedRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return route_handler